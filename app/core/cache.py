@@ -1,12 +1,21 @@
 import os
 import json
+import time
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from typing import Any, Optional
 
 logger = logging.getLogger(__name__)
 
 _redis_client = None
-_memory_cache = {}
+# fallback when redis is unavailable: lru bounded by CACHE_MEMORY_MAX_ITEMS, expired entries swept periodically
+_memory_cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+_memory_lock = threading.Lock()
+_memory_max = int(os.getenv("CACHE_MEMORY_MAX_ITEMS", "10000"))
+_sweep_interval = 60.0
+_last_sweep = 0.0
 
 def _get_redis():
     global _redis_client
@@ -25,6 +34,30 @@ def _get_redis():
             _redis_client = False
     return _redis_client if _redis_client else None
 
+def _memory_get(key: str) -> Optional[dict]:
+    with _memory_lock:
+        entry = _memory_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del _memory_cache[key]
+            return None
+        _memory_cache.move_to_end(key)
+        return entry[1]
+
+def _memory_set(key: str, value: dict, ttl: int) -> None:
+    global _last_sweep
+    now = time.time()
+    with _memory_lock:
+        _memory_cache[key] = (now + ttl, value)
+        _memory_cache.move_to_end(key)
+        if now - _last_sweep > _sweep_interval:
+            _last_sweep = now
+            for k in [k for k, (expires_at, _) in _memory_cache.items() if expires_at < now]:
+                del _memory_cache[k]
+        while len(_memory_cache) > _memory_max:
+            _memory_cache.popitem(last=False)
+
 def cache_get(key: str) -> Optional[dict]:
     """get from redis, fallback to memory only if redis unavailable."""
     r = _get_redis()
@@ -36,10 +69,11 @@ def cache_get(key: str) -> Optional[dict]:
                 return json.loads(val)
         except Exception as e:
             logger.warning(f"redis error: {e}")
-    elif key in _memory_cache:
+        return None
+    value = _memory_get(key)
+    if value is not None:
         logger.info(f"memory hit: {key[:16]}")
-        return _memory_cache[key]
-    return None
+    return value
 
 def cache_set(key: str, value: dict, ttl: int = 86400) -> None:
     """set in redis, fallback to memory only if redis unavailable."""
@@ -49,13 +83,26 @@ def cache_set(key: str, value: dict, ttl: int = 86400) -> None:
             r.setex(key, ttl, json.dumps(value))
         except Exception as e:
             logger.warning(f"redis error: {e}")
-            _memory_cache[key] = value
+            _memory_set(key, value, ttl)
+    else:
+        _memory_set(key, value, ttl)
+
+async def cache_get_async(key: str) -> Optional[dict]:
+    """cache_get for coroutines: redis round trips (and the first connect) run in a thread, off the event loop."""
+    if _redis_client is False:
+        return cache_get(key)
+    return await asyncio.to_thread(cache_get, key)
+
+async def cache_set_async(key: str, value: dict, ttl: int = 86400) -> None:
+    """cache_set for coroutines, see cache_get_async."""
+    if _redis_client is False:
+        cache_set(key, value, ttl)
     else:
-        _memory_cache[key] = value
+        await asyncio.to_thread(cache_set, key, value, ttl)
 
 def cache_clear() -> None:
-    global _memory_cache
-    _memory_cache.clear()
+    with _memory_lock:
+        _memory_cache.clear()
     r = _get_redis()
     if r:
         try:
@@ -1,9 +1,14 @@
 import os
+import time
+import logging
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from app.core import metrics
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -19,12 +24,30 @@ if DATABASE_URL:
     if DATABASE_URL.startswith("postgresql://"):
         DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+# below the managed postgres idle cutoff so we never check out a dropped connection
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+engine_kwargs = {}
+if DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
+    # sqlite (local dev) keeps sqlalchemy's default pool for its driver; sizing only applies to server databases
+    engine_kwargs = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+if DATABASE_URL and "+asyncpg" in DATABASE_URL:
+    # per-connection prepared statement lru (0 disables, e.g. behind pgbouncer transaction mode)
+    connect_args["prepared_statement_cache_size"] = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
 # sqlalchemy 1.4+ async engine
 engine = create_async_engine(
     DATABASE_URL,
     echo=False, # set to true for sql logs
     future=True,
-    connect_args=connect_args
+    connect_args=connect_args,
+    **engine_kwargs
 )
 
 async_session = sessionmaker(
@@ -33,6 +56,51 @@ async_session = sessionmaker(
 
 Base = declarative_base()
 
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, record):
+    record.info["connected_at"] = time.time()
+    metrics.incr("db.pool.connects")
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, record, proxy):
+    record.info["checked_out_at"] = time.perf_counter()
+    metrics.incr("db.pool.checkouts")
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout") and pool.checkedout() > pool.size():
+        metrics.incr("db.pool.overflow_checkouts")  # pool_size exhausted; next stop is waiting on pool_timeout
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, record):
+    start = record.info.pop("checked_out_at", None)
+    if start is not None:
+        metrics.observe("db.pool.hold", time.perf_counter() - start)
+
+@event.listens_for(engine.sync_engine, "close")
+def _on_close(dbapi_connection, record):
+    connected_at = record.info.get("connected_at") if record is not None else None
+    recycle = engine_kwargs.get("pool_recycle", -1)
+    if recycle > -1 and connected_at is not None and time.time() - connected_at > recycle:
+        metrics.incr("db.pool.recycled")
+    else:
+        metrics.incr("db.pool.closed")
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_connection, record, exception):
+    metrics.incr("db.pool.invalidated")  # includes failed pre-pings
+
+def pool_stats() -> dict:
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+    }
+
+metrics.register_gauge("db.pool", pool_stats)
+
 async def get_db():
     async with async_session() as session:
         try:
@@ -1,59 +1,119 @@
+import io
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Iterator, Optional, Union
 from pypdf import PdfReader
 from docx import Document
 
 logger = logging.getLogger(__name__)
 
+# the ai prompts use at most ~4000 chars of a document; leave headroom for whitespace
+MAX_CHARS = int(os.getenv("PARSE_MAX_CHARS", "6000"))
+MAX_PAGE_CHARS = int(os.getenv("PARSE_MAX_PAGE_CHARS", "4000"))
+
+class _PageCapReached(Exception):
+    pass
+
 class DocumentParser:
     """generic parser for pdf, docx, and txt files."""
     
     @staticmethod
-    def parse(file_path: str) -> Dict[str, Any]:
-        """parses document and returns content with metadata."""
+    def parse(file_path: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """parses document and returns content with metadata (pdfs stop once max_chars is collected)."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"file not found: {file_path}")
             
         ext = os.path.splitext(file_path)[1].lower()
         
         try:
-            if ext == ".pdf":
-                return DocumentParser._parse_pdf(file_path)
-            elif ext in [".docx", ".doc"]:
-                return DocumentParser._parse_docx(file_path)
-            elif ext == ".txt":
-                 with open(file_path, 'r', encoding='utf-8') as f:
-                     return {"content": f.read(), "metadata": {"type": "text"}}
-            else:
-                raise ValueError(f"unsupported file format: {ext}")
-                
+            return DocumentParser._parse_source(file_path, ext, max_chars)
         except Exception as e:
             logger.error(f"failed to parse {file_path}: {e}")
             return {"content": "", "metadata": {"error": str(e)}}
 
     @staticmethod
-    def _parse_pdf(file_path: str) -> Dict[str, Any]:
-        """extracts text from pdf."""
-        reader = PdfReader(file_path)
-        text = ""
+    def parse_stream(source: Union[bytes, BinaryIO], filename: str, max_chars: Optional[int] = None) -> Dict[str, Any]:
+        """parses an in-memory upload (bytes or binary file object); format comes from filename."""
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        ext = os.path.splitext(filename or "")[1].lower()
+
+        try:
+            return DocumentParser._parse_source(source, ext, max_chars)
+        except Exception as e:
+            logger.error(f"failed to parse upload {filename}: {e}")
+            return {"content": "", "metadata": {"error": str(e)}}
+
+    @staticmethod
+    def _parse_source(source: Union[str, BinaryIO], ext: str, max_chars: Optional[int]) -> Dict[str, Any]:
+        if ext == ".pdf":
+            return DocumentParser._parse_pdf(source, max_chars or MAX_CHARS)
+        elif ext in [".docx", ".doc"]:
+            return DocumentParser._parse_docx(source)
+        elif ext == ".txt":
+            if isinstance(source, str):
+                with open(source, 'r', encoding='utf-8') as f:
+                    return {"content": f.read(), "metadata": {"type": "text"}}
+            return {"content": source.read().decode("utf-8", errors="replace"), "metadata": {"type": "text"}}
+        else:
+            raise ValueError(f"unsupported file format: {ext}")
+
+    @staticmethod
+    def iter_pdf_pages(reader: PdfReader, max_page_chars: int = MAX_PAGE_CHARS) -> Iterator[Dict[str, Any]]:
+        """yields {page, text, chars, truncated} one page at a time; extraction of a page is
+        aborted once it has produced max_page_chars."""
+        for number, page in enumerate(reader.pages, start=1):
+            parts, collected = [], 0
+
+            def visit(text, *_):
+                nonlocal collected
+                if text:
+                    parts.append(text)
+                    collected += len(text)
+                    if collected >= max_page_chars:
+                        raise _PageCapReached()
+
+            truncated = False
+            try:
+                page.extract_text(visitor_text=visit)
+            except _PageCapReached:
+                truncated = True
+            except Exception as e:
+                logger.warning(f"page {number}: text extraction failed: {e}")
+            text = "".join(parts)[:max_page_chars].strip()
+            yield {"page": number, "text": text, "chars": len(text), "truncated": truncated}
+
+    @staticmethod
+    def _parse_pdf(source: Union[str, BinaryIO], max_chars: int = MAX_CHARS) -> Dict[str, Any]:
+        """extracts text page by page until max_chars is reached."""
+        reader = PdfReader(source)
         meta = {}
         
         if reader.metadata:
             meta = {k: str(v) for k, v in reader.metadata.items()}
-            
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-            
+
+        texts, pages, total = [], [], 0
+        for page in DocumentParser.iter_pdf_pages(reader):
+            pages.append({k: page[k] for k in ("page", "chars", "truncated")})
+            if page["text"]:
+                texts.append(page["text"])
+                total += page["chars"] + 1
+            if total >= max_chars:
+                break
+
+        content = "\n".join(texts)[:max_chars]
         return {
-            "content": text.strip(),
-            "metadata": {**meta, "type": "pdf", "pages": len(reader.pages)}
+            "content": content,
+            "metadata": {
+                **meta, "type": "pdf", "pages": len(reader.pages), "pages_read": len(pages),
+                "truncated": total >= max_chars or any(p["truncated"] for p in pages), "page_info": pages,
+            }
         }
 
     @staticmethod
-    def _parse_docx(file_path: str) -> Dict[str, Any]:
+    def _parse_docx(source: Union[str, BinaryIO]) -> Dict[str, Any]:
         """extracts text from docx."""
-        doc = Document(file_path)
+        doc = Document(source)
         text = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
         
         return {
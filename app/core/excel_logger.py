@@ -1,56 +1,143 @@
 import os
-from datetime import datetime
+import json
+import queue
+import atexit
 import logging
-import openpyxl
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator
 from openpyxl import Workbook, load_workbook
 from app.schemas.company import CredibilityAnalysis, CompanyInput
 
 logger = logging.getLogger(__name__)
 
 class ExcelLogger:
+    """
+    verification log: rows are queued to one writer thread that appends jsonl lines
+    (O_APPEND, so several worker processes can share the file); the excel workbook is
+    only built on export
+    """
+    LOG_PATH = "reports/verification_log.jsonl"
     FILE_PATH = "reports/master_log.xlsx"
-    
+
     HEADERS = [
         "Timestamp", "Company Name", "Trust Score", "Tier", "Status",
         "Registry Found", "HR Verified", "Address Verified", "Email Domain Match",
         "LinkedIn Match", "Website Match", "Report Path"
     ]
 
+    _queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+    _writer: threading.Thread = None
+    _writer_lock = threading.Lock()
+
     @classmethod
     def log_verification(cls, input_data: CompanyInput, analysis: CredibilityAnalysis):
+        """queues one row; never blocks on disk."""
+        signals = analysis.details.get("signals", {})
+        row = [
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            input_data.name,
+            analysis.trust_score,
+            analysis.trust_tier,
+            analysis.verification_status,
+            signals.get("registry_link_found", False),
+            signals.get("hr_verified", False),
+            signals.get("address_verified", False),
+            signals.get("email_domain_match", False),
+            signals.get("linkedin_verified", False),
+            signals.get("website_content_match", False),
+            analysis.details.get("report_path", "N/A")
+        ]
+        cls._ensure_writer()
+        cls._queue.put(dict(zip(cls.HEADERS, row)))
+
+    @classmethod
+    def _ensure_writer(cls):
+        with cls._writer_lock:
+            if cls._writer is None or not cls._writer.is_alive():
+                cls._import_legacy_workbook()
+                cls._writer = threading.Thread(target=cls._write_loop, name="verification-log-writer", daemon=True)
+                cls._writer.start()
+                atexit.register(cls.flush)
+
+    @classmethod
+    def _write_loop(cls):
+        while True:
+            rows = [cls._queue.get()]
+            # drain whatever else is waiting into the same write
+            while True:
+                try:
+                    rows.append(cls._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                os.makedirs(os.path.dirname(cls.LOG_PATH), exist_ok=True)
+                data = "".join(json.dumps(r, default=str) + "\n" for r in rows)
+                with open(cls.LOG_PATH, "a", encoding="utf-8") as f:
+                    f.write(data)
+                logger.info(f"logged {len(rows)} verification(s): {cls.LOG_PATH}")
+            except Exception as e:
+                logger.error(f"Failed to write verification log: {e}")
+            finally:
+                for _ in rows:
+                    cls._queue.task_done()
+
+    @classmethod
+    def flush(cls):
+        """blocks until queued rows are on disk."""
+        if cls._writer is not None and cls._writer.is_alive():
+            cls._queue.join()
+
+    @classmethod
+    def _import_legacy_workbook(cls):
+        """one-time carry-over of rows from the old rewrite-per-row workbook."""
+        if os.path.exists(cls.LOG_PATH) or not os.path.exists(cls.FILE_PATH):
+            return
         try:
-            # Ensure directory exists
-            os.makedirs("reports", exist_ok=True)
-            
-            # Load or Create Workbook
-            if os.path.exists(cls.FILE_PATH):
-                wb = load_workbook(cls.FILE_PATH)
-                ws = wb.active
-            else:
-                wb = Workbook()
-                ws = wb.active
-                ws.append(cls.HEADERS)
-            
-            # Prepare Data Row
-            signals = analysis.details.get("signals", {})
-            row = [
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                input_data.name,
-                analysis.trust_score,
-                analysis.trust_tier,
-                analysis.verification_status,
-                signals.get("registry_link_found", False),
-                signals.get("hr_verified", False),
-                signals.get("address_verified", False),
-                signals.get("email_domain_match", False),
-                signals.get("linkedin_verified", False),
-                signals.get("website_content_match", False),
-                analysis.details.get("report_path", "N/A")
-            ]
-            
-            ws.append(row)
-            wb.save(cls.FILE_PATH)
-            logger.info(f"Logged to Excel: {cls.FILE_PATH}")
-            
+            wb = load_workbook(cls.FILE_PATH, read_only=True)
+            ws = wb.active
+            headers = [cell.value for cell in ws[1]]
+            os.makedirs(os.path.dirname(cls.LOG_PATH), exist_ok=True)
+            with open(cls.LOG_PATH, "a", encoding="utf-8") as f:
+                for values in ws.iter_rows(min_row=2, values_only=True):
+                    f.write(json.dumps(dict(zip(headers, values)), default=str) + "\n")
+            wb.close()
+            logger.info(f"imported legacy excel log into {cls.LOG_PATH}")
         except Exception as e:
-            logger.error(f"Failed to log to Excel: {e}")
+            logger.error(f"legacy excel import failed: {e}")
+
+    @classmethod
+    def read_rows(cls) -> Iterator[Dict[str, Any]]:
+        """streams logged rows in write order."""
+        cls._import_legacy_workbook()
+        if not os.path.exists(cls.LOG_PATH):
+            return
+        with open(cls.LOG_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # torn line from a crash mid-write
+
+    @classmethod
+    def export_xlsx(cls, path: str = None) -> str:
+        """builds the workbook from the log in write-only (streaming) mode."""
+        path = path or cls.FILE_PATH
+        cls.flush()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(cls.HEADERS)
+        count = 0
+        for row in cls.read_rows():
+            ws.append([row.get(h) for h in cls.HEADERS])
+            count += 1
+
+        tmp = f"{os.path.splitext(path)[0]}.tmp.xlsx"
+        wb.save(tmp)
+        os.replace(tmp, path)
+        logger.info(f"exported {count} rows to {path}")
+        return path
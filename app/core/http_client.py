@@ -0,0 +1,29 @@
+import os
+import logging
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """returns the app-wide pooled keep-alive client, created on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        )
+        timeout = httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", "5")))
+        _client = httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True)
+        logger.info(f"http pool ready (max={limits.max_connections}, keepalive={limits.max_keepalive_connections})")
+    return _client
+
+async def close_http_client() -> None:
+    """closes the shared client and its pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pydantic import BaseModel
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+class Job(BaseModel):
+    id: str
+    type: str
+    payload: Dict[str, Any]
+    status: str = "queued"  # queued | running | done | failed
+    attempts: int = 0
+    max_attempts: int = 3
+    dedupe_key: Optional[str] = None
+    run_at: float = 0.0
+    lease_until: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+class JobQueue(ABC):
+    """
+    durable queue shared by the api (producers) and worker processes (consumers)
+    jobs are leased while running; an expired lease (crashed worker) makes the job claimable again
+    """
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None,
+                max_attempts: int = 3) -> str:
+        """adds a job, or returns the id of a queued/running job with the same dedupe key"""
+        pass
+
+    @abstractmethod
+    def claim(self, job_type: str, lease_seconds: float) -> Optional[Job]:
+        """leases the next due job of this type, if any"""
+        pass
+
+    @abstractmethod
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, retry_delay: float) -> None:
+        """schedules a retry after retry_delay, or marks failed once attempts are used up"""
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def depth(self) -> Dict[str, int]:
+        """queued job count per type"""
+        pass
+
+class SQLiteJobQueue(JobQueue):
+    """single-host backend; safe across processes via sqlite file locking"""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                dedupe_key TEXT,
+                run_at REAL NOT NULL,
+                lease_until REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (type, status, run_at);
+            CREATE INDEX IF NOT EXISTS ix_jobs_dedupe ON jobs (dedupe_key, status);
+        """)
+
+    def _row_to_job(self, row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data["payload"] = json.loads(data["payload"])
+        data["result"] = json.loads(data["result"]) if data["result"] else None
+        return Job(**data)
+
+    def enqueue(self, job_type, payload, dedupe_key=None, max_attempts=3) -> str:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key:
+                    row = self._conn.execute(
+                        "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') LIMIT 1",
+                        (dedupe_key,)
+                    ).fetchone()
+                    if row:
+                        self._conn.execute("COMMIT")
+                        metrics.incr(f"jobs.{job_type}.deduped")
+                        return row["id"]
+                job_id = str(uuid.uuid4())
+                self._conn.execute(
+                    "INSERT INTO jobs (id, type, payload, status, attempts, max_attempts, dedupe_key, run_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', 0, ?, ?, ?, ?, ?)",
+                    (job_id, job_type, json.dumps(payload), max_attempts, dedupe_key, now, now, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        metrics.incr(f"jobs.{job_type}.enqueued")
+        return job_id
+
+    def claim(self, job_type, lease_seconds) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE type = ? AND ((status = 'queued' AND run_at <= ?) "
+                        "OR (status = 'running' AND lease_until < ?)) ORDER BY run_at LIMIT 1",
+                        (job_type, now, now)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    if row["status"] == "running" and row["attempts"] >= row["max_attempts"]:
+                        # worker died on its last attempt
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'failed', error = 'lease expired', updated_at = ? WHERE id = ?",
+                            (now, row["id"])
+                        )
+                        continue
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                        (now + lease_seconds, now, row["id"])
+                    )
+                    self._conn.execute("COMMIT")
+                    job = self._row_to_job(row)
+                    job.status, job.attempts, job.lease_until = "running", job.attempts + 1, now + lease_seconds
+                    return job
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def complete(self, job_id, result=None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result) if result is not None else None, time.time(), job_id)
+            )
+
+    def fail(self, job_id, error, retry_delay) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+                "run_at = ?, lease_until = NULL, error = ?, updated_at = ? WHERE id = ?",
+                (now + retry_delay, error[:1000], now, job_id)
+            )
+
+    def get(self, job_id) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT type, COUNT(*) AS n FROM jobs WHERE status = 'queued' GROUP BY type"
+            ).fetchall()
+        return {r["type"]: r["n"] for r in rows}
+
+class RedisJobQueue(JobQueue):
+    """multi-host backend: job json in `job:{id}`, ready list + delayed/running zsets per type"""
+
+    def __init__(self, client, prefix: str = "jobs"):
+        self.r = client
+        self.prefix = prefix
+        self.retention = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400)))
+
+    def _k(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def _save(self, job: Job) -> None:
+        ttl = self.retention if job.status in ("done", "failed") else None
+        self.r.set(self._k("job", job.id), job.model_dump_json(), ex=ttl)
+
+    def enqueue(self, job_type, payload, dedupe_key=None, max_attempts=3) -> str:
+        now = time.time()
+        job = Job(id=str(uuid.uuid4()), type=job_type, payload=payload, max_attempts=max_attempts,
+                  dedupe_key=dedupe_key, run_at=now, created_at=now, updated_at=now)
+        if dedupe_key:
+            # SET NX claims the key atomically; an existing live job wins
+            dkey = self._k("dedupe", dedupe_key)
+            if not self.r.set(dkey, job.id, nx=True, ex=self.retention):
+                existing = self.get(self.r.get(dkey) or "")
+                if existing and existing.status in ("queued", "running"):
+                    metrics.incr(f"jobs.{job_type}.deduped")
+                    return existing.id
+                self.r.set(dkey, job.id, ex=self.retention)
+        self._save(job)
+        self.r.lpush(self._k("ready", job_type), job.id)
+        metrics.incr(f"jobs.{job_type}.enqueued")
+        return job.id
+
+    def _promote(self, job_type: str, now: float) -> None:
+        """moves due retries and expired leases back onto the ready list"""
+        for zset in ("delayed", "running"):
+            key = self._k(zset, job_type)
+            for job_id in self.r.zrangebyscore(key, 0, now, start=0, num=50):
+                if self.r.zrem(key, job_id):  # only one worker wins the move
+                    self.r.lpush(self._k("ready", job_type), job_id)
+
+    def claim(self, job_type, lease_seconds) -> Optional[Job]:
+        now = time.time()
+        self._promote(job_type, now)
+        while True:
+            job_id = self.r.rpop(self._k("ready", job_type))
+            if not job_id:
+                return None
+            job = self.get(job_id)
+            if not job or job.status in ("done", "failed"):
+                continue
+            if job.status == "running" and job.attempts >= job.max_attempts:
+                job.status, job.error, job.updated_at = "failed", "lease expired", now
+                self._save(job)
+                continue
+            job.status, job.attempts = "running", job.attempts + 1
+            job.lease_until, job.updated_at = now + lease_seconds, now
+            self._save(job)
+            self.r.zadd(self._k("running", job_type), {job.id: job.lease_until})
+            return job
+
+    def complete(self, job_id, result=None) -> None:
+        job = self.get(job_id)
+        if not job:
+            return
+        job.status, job.result, job.error = "done", result, None
+        job.lease_until, job.updated_at = None, time.time()
+        self.r.zrem(self._k("running", job.type), job_id)
+        self._save(job)
+
+    def fail(self, job_id, error, retry_delay) -> None:
+        job = self.get(job_id)
+        if not job:
+            return
+        now = time.time()
+        self.r.zrem(self._k("running", job.type), job_id)
+        job.error, job.lease_until, job.updated_at = error[:1000], None, now
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            self._save(job)
+        else:
+            job.status, job.run_at = "queued", now + retry_delay
+            self._save(job)
+            self.r.zadd(self._k("delayed", job.type), {job_id: job.run_at})
+
+    def get(self, job_id) -> Optional[Job]:
+        raw = self.r.get(self._k("job", job_id)) if job_id else None
+        return Job.model_validate_json(raw) if raw else None
+
+    def depth(self) -> Dict[str, int]:
+        depth = {}
+        for key in self.r.scan_iter(self._k("ready", "*")):
+            depth[key.split(":")[-1]] = self.r.llen(key)
+        return depth
+
+_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """redis when JOB_BACKEND=redis (or unset with REDIS_URL reachable), else local sqlite"""
+    global _queue
+    if _queue is None:
+        from app.core.cache import _get_redis
+        backend = os.getenv("JOB_BACKEND", "").lower()
+        r = _get_redis() if backend in ("", "redis") else None
+        if r:
+            _queue = RedisJobQueue(r)
+        else:
+            if backend == "redis":
+                logger.warning("JOB_BACKEND=redis but redis unavailable, using sqlite")
+            _queue = SQLiteJobQueue(os.getenv("JOB_DB_PATH", "outputs/jobs.db"))
+        logger.info(f"job queue: {type(_queue).__name__}")
+        metrics.register_gauge("jobs.queued", _queue.depth)
+    return _queue
+
+class JobWorker:
+    """runs registered async handlers for queued jobs with per-type concurrency and retries.
+    handlers get (payload, job_id); the id is stable across retries so handlers can make their writes idempotent."""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict[str, Any], str], Awaitable[Optional[Dict[str, Any]]]]]):
+        self.queue = queue
+        self.handlers = handlers
+        self.lease = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+        self.retry_base = float(os.getenv("JOB_RETRY_DELAY", "5"))
+
+    @staticmethod
+    def concurrency_for(job_type: str) -> int:
+        """JOB_CONCURRENCY_<TYPE> overrides JOB_CONCURRENCY (default 4)"""
+        return int(os.getenv(f"JOB_CONCURRENCY_{job_type.upper()}", os.getenv("JOB_CONCURRENCY", "4")))
+
+    async def run(self, stop: asyncio.Event) -> None:
+        consumers = [
+            asyncio.create_task(self._consume(job_type, stop))
+            for job_type in self.handlers
+            for _ in range(self.concurrency_for(job_type))
+        ]
+        logger.info(f"job worker started: { {t: self.concurrency_for(t) for t in self.handlers} }")
+        await asyncio.gather(*consumers)
+
+    async def _consume(self, job_type: str, stop: asyncio.Event) -> None:
+        handler = self.handlers[job_type]
+        while not stop.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim, job_type, self.lease)
+            except Exception as e:
+                logger.error(f"job claim ({job_type}): {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = await handler(job.payload, job.id)
+                await asyncio.to_thread(self.queue.complete, job.id, result)
+                metrics.incr(f"jobs.{job_type}.done")
+            except Exception as e:
+                delay = self.retry_base * (2 ** (job.attempts - 1))
+                logger.error(f"job {job.id} ({job_type}) attempt {job.attempts}/{job.max_attempts} failed: {e}")
+                await asyncio.to_thread(self.queue.fail, job.id, str(e), delay)
+                metrics.incr(f"jobs.{job_type}.failed")
+            metrics.observe(f"jobs.{job_type}", time.perf_counter() - start)
@@ -0,0 +1,45 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_timings: Dict[str, Dict[str, float]] = {}
+_gauges: Dict[str, Callable[[], Any]] = {}
+
+def incr(name: str, n: int = 1) -> None:
+    """bumps a per-process counter."""
+    with _lock:
+        _counters[name] += n
+
+def observe(name: str, seconds: float) -> None:
+    """records one duration sample (count/total/max)."""
+    with _lock:
+        t = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        t["count"] += 1
+        t["total"] += seconds
+        t["max"] = max(t["max"], seconds)
+
+def register_gauge(name: str, fn: Callable[[], Any]) -> None:
+    """registers a callable read on every snapshot (queue depth, pool stats...)."""
+    _gauges[name] = fn
+
+def snapshot() -> Dict[str, Any]:
+    """returns counters, timing summaries (ms) and current gauge values."""
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            k: {
+                "count": v["count"],
+                "avg_ms": round(v["total"] / v["count"] * 1000, 2) if v["count"] else 0,
+                "max_ms": round(v["max"] * 1000, 2),
+            }
+            for k, v in _timings.items()
+        }
+    gauges = {}
+    for name, fn in list(_gauges.items()):
+        try:
+            gauges[name] = fn()
+        except Exception as e:
+            gauges[name] = {"error": str(e)}
+    return {"counters": counters, "timings": timings, "gauges": gauges}
@@ -0,0 +1,95 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+from app.core.document_parser import DocumentParser
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+PARSE_MAX_PENDING = int(os.getenv("PARSE_MAX_PENDING", "16"))
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", "20"))
+
+class ParserBusy(Exception):
+    """more documents waiting than PARSE_MAX_PENDING."""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process with a running event loop and threads can deadlock the child
+        _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _reset_pool() -> None:
+    """kills the workers (a stuck parse cannot be cancelled otherwise); the next call starts fresh ones."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _timed(fn, *args) -> Dict[str, Any]:
+    """runs in a worker process."""
+    start = time.perf_counter()
+    result = fn(*args)
+    result.setdefault("metadata", {})["parse_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+async def _submit(fn, *args) -> Dict[str, Any]:
+    global _pending
+    if _pending >= PARSE_MAX_PENDING:
+        metrics.incr("parse.rejected")
+        raise ParserBusy(f"{_pending} documents already queued")
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        for attempt in (1, 2):
+            loop = asyncio.get_running_loop()
+            try:
+                result = await asyncio.wait_for(loop.run_in_executor(_get_pool(), _timed, fn, *args), PARSE_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                metrics.incr("parse.timeout")
+                logger.error(f"document parse exceeded {PARSE_TIMEOUT}s; restarting parse workers")
+                _reset_pool()
+                raise
+            except BrokenProcessPool:
+                # another document's timeout recycled the pool under us
+                _reset_pool()
+                if attempt == 2:
+                    raise
+        elapsed = time.perf_counter() - start
+        run = result.get("metadata", {}).get("parse_seconds", 0.0)
+        metrics.observe("parse.run", run)
+        metrics.observe("parse.wait", max(0.0, elapsed - run))
+        return result
+    finally:
+        _pending -= 1
+
+async def parse(file_path: str) -> Dict[str, Any]:
+    """DocumentParser.parse in the parse pool."""
+    return await _submit(DocumentParser.parse, file_path)
+
+async def parse_stream(data: bytes, filename: str) -> Dict[str, Any]:
+    """DocumentParser.parse_stream in the parse pool."""
+    return await _submit(DocumentParser.parse_stream, data, filename)
+
+def stats() -> Dict[str, Any]:
+    return {"pending": _pending, "workers": PARSE_WORKERS, "max_pending": PARSE_MAX_PENDING}
+
+metrics.register_gauge("parse.pool", stats)
+
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
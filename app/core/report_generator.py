@@ -23,7 +23,7 @@ class ReportGenerator(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-    def generate(self) -> str:
+    def generate(self, filename: str = None) -> str:
         """generates pdf and returns filename."""
         self._add_title_section()
         self._add_score_section()
@@ -31,8 +31,8 @@ class ReportGenerator(FPDF):
         self._add_verification_details()
         self._add_red_flags()
         
-        filename = f"reports/{self.company_name.replace(' ', '_')}_Report.pdf"
-        os.makedirs("reports", exist_ok=True)
+        filename = filename or f"reports/{self.company_name.replace(' ', '_')}_Report.pdf"
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
         self.output(filename)
         return filename
 
@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.schemas.company import CredibilityAnalysis
+from app.core.singleflight import SingleFlight
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+REPORT_DIR = "reports"
+CACHE_DIR = os.path.join(REPORT_DIR, "cache")
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_renders = SingleFlight("report")
+
+def report_filename(company_name: str) -> str:
+    return f"{company_name.replace(' ', '_')}_Report.pdf"
+
+def analysis_digest(company_name: str, analysis: Dict[str, Any]) -> str:
+    """content hash of what the pdf shows; identical analyses share one rendered file."""
+    details = {k: v for k, v in analysis.get("details", {}).items() if k not in ("report_path", "report_digest", "job_id")}
+    body = {**analysis, "details": details, "company_name": company_name}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+def _sidecar_path(filename: str) -> str:
+    return os.path.join(REPORT_DIR, f"{os.path.splitext(filename)[0]}.json")
+
+def _write_sidecar(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp, path)
+
+def _digest_sidecar_path(digest: str) -> str:
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+async def register(company_name: str, analysis: CredibilityAnalysis) -> Tuple[str, str]:
+    """records the analysis behind a report (no pdf work); returns (report path clients download, content digest).
+    the per-company sidecar points at the latest analysis, the per-digest one keeps this version renderable."""
+    filename = report_filename(company_name)
+    data = analysis.model_dump()
+    digest = analysis_digest(company_name, data)
+    sidecar = {"company_name": company_name, "digest": digest, "analysis": data}
+
+    def write():
+        _write_sidecar(_digest_sidecar_path(digest), sidecar)
+        _write_sidecar(_sidecar_path(filename), sidecar)
+
+    await asyncio.to_thread(write)
+    return f"{REPORT_DIR}/{filename}", digest
+
+def _render_pdf(company_name: str, analysis: Dict[str, Any], path: str) -> str:
+    """runs in a worker process."""
+    from app.core.report_generator import ReportGenerator
+    tmp = f"{path}.{os.getpid()}.tmp"
+    ReportGenerator(CredibilityAnalysis(**analysis), company_name).generate(tmp)
+    os.replace(tmp, path)
+    return path
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn like parse_pool: a forked child would inherit the api's event loop and thread state
+        _pool = ProcessPoolExecutor(max_workers=int(os.getenv("REPORT_WORKERS", "2")),
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+async def resolve(filename: str) -> Optional[str]:
+    """path of the rendered pdf for `filename`, rendering it on first request; None if unknown."""
+    if os.path.basename(filename) != filename or not filename.endswith(".pdf"):
+        return None
+    sidecar = _sidecar_path(filename)
+    if not os.path.exists(sidecar):
+        # reports rendered before lazy rendering existed
+        legacy = os.path.join(REPORT_DIR, filename)
+        return legacy if os.path.exists(legacy) else None
+
+    with open(sidecar, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return await _rendered(data, filename)
+
+async def resolve_digest(digest: str, filename: str) -> Optional[str]:
+    """path of the pdf for one specific analysis version, rendering it if needed; None if unknown."""
+    if not _DIGEST_RE.match(digest or ""):
+        return None
+    sidecar = _digest_sidecar_path(digest)
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return await _rendered(data, filename)
+
+async def _rendered(data: Dict[str, Any], filename: str) -> str:
+    """cached pdf for the sidecar's digest, rendered once across concurrent callers."""
+    path = os.path.join(CACHE_DIR, f"{data['digest']}.pdf")
+    if os.path.exists(path):
+        metrics.incr("report.cache.hit")
+        return path
+
+    async def render():
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_get_pool(), _render_pdf, data["company_name"], data["analysis"], path)
+        metrics.observe("report.render", time.perf_counter() - start)
+        logger.info(f"rendered report {filename} -> {path}")
+        return path
+
+    metrics.incr("report.cache.miss")
+    result, _ = await _renders.do(data["digest"], render)
+    return result
+
+class _ZipSink:
+    """write-only, non-seekable target: zipfile then emits data descriptors instead of seeking back."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+async def stream_zip(reports: List[Tuple[str, Optional[str]]], concurrency: int = 4,
+                     chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """zips (filename, digest) reports as they become ready (missing ones render concurrently), yielding bytes.
+    a digest pins the exact analysis version; without one the latest report for the filename is used."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def ready(name: str, digest: Optional[str]):
+        async with sem:
+            try:
+                path = await resolve_digest(digest, name) if digest else None
+                return name, path or await resolve(name), None
+            except Exception as e:
+                logger.error(f"export: could not render {name}: {e}")
+                return name, None, str(e)
+
+    sink = _ZipSink()
+    manifest = ["file,status"]
+    pending = [asyncio.ensure_future(ready(n, d)) for n, d in reports]
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for fut in asyncio.as_completed(pending):
+                name, path, error = await fut
+                if not path:
+                    manifest.append(f"{name},{'error' if error else 'missing'}")
+                    continue
+                with await asyncio.to_thread(open, path, "rb") as src, zf.open(name, "w") as dst:
+                    while True:
+                        block = await asyncio.to_thread(src.read, chunk_size)
+                        if not block:
+                            break
+                        dst.write(block)
+                        yield sink.drain()
+                manifest.append(f"{name},ok")
+                yield sink.drain()
+            zf.writestr("manifest.csv", "\n".join(manifest) + "\n")
+        yield sink.drain()
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.core import metrics
+
+class SingleFlight:
+    """coalesces concurrent calls sharing a key into one execution (per worker)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """runs fn once per key; returns (result, shared) where shared means we joined a running call."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            metrics.incr(f"singleflight.{self.name}.executed")
+        else:
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+        # shield so one caller disconnecting does not cancel the shared run
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -1,39 +1,101 @@
-import random
-from app.schemas.allocation import AllocationRequest, AllocationResponse
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from app.schemas.allocation import (
+    AllocationRequest, AllocationResponse, CohortAllocationRequest, CohortAllocationResponse, CohortAssignment,
+    FacultyProfile, StudentProfile
+)
 from app.engine.factory import get_ai_provider
+from app.engine.faculty_roster import FacultyRosterRegistry, Roster
+from app.engine.faculty_ranker import FacultyRanker
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
 
 class AllocationEngine:
     """handles faculty-student allocation based on expertise matching."""
     
-    def __init__(self):
-        self.ai = get_ai_provider()
+    def __init__(self, ai=None, rosters: FacultyRosterRegistry = None):
+        self.ai = ai or get_ai_provider()
+        self.rosters = rosters or FacultyRosterRegistry()
+        # only the best local matches go into the llm prompt
+        self.top_k = int(os.getenv("ALLOCATION_TOP_K", "10"))
+        # max seconds to wait on the ai before answering from the local ranking
+        self.latency_budget = float(os.getenv("ALLOCATION_LATENCY_BUDGET", "8"))
+
+    @staticmethod
+    def _workload_score(faculty: FacultyProfile) -> float:
+        if faculty.max_capacity <= 0:
+            return 0.0
+        return max(0.0, (faculty.max_capacity - faculty.current_load) / faculty.max_capacity * 100)
+
+    async def _ai_call(self, coro, what: str):
+        """awaits an ai call within the latency budget; returns (result, fallback_reason)."""
+        try:
+            res = await asyncio.wait_for(coro, timeout=self.latency_budget)
+        except asyncio.TimeoutError:
+            metrics.incr(f"allocation.{what}.timeout")
+            logger.warning(f"{what}: ai exceeded {self.latency_budget}s budget, using local ranking")
+            return {}, "timeout"
+        except Exception as e:
+            metrics.incr(f"allocation.{what}.ai_error")
+            logger.error(f"{what}: ai failed: {e}")
+            return {}, "ai_error"
+        if not res or res.get("error"):
+            metrics.incr(f"allocation.{what}.ai_error")
+            return {}, "ai_unavailable"
+        return res, None
+
+    def _local_ranking(self, roster: Roster, student: StudentProfile):
+        """deterministic fallback: 80% local expertise + 20% workload, faculty with free capacity only,
+        ties broken by faculty id."""
+        ranked = roster.ranker.rank(student, 0, roster.candidates(student))
+        scored = [
+            (round(s * 0.8 + self._workload_score(f) * 0.2, 1), s, f)
+            for f, s in ranked if f.current_load < f.max_capacity
+        ]
+        return sorted(scored, key=lambda x: (-x[0], x[2].id))
 
-    def allocate(self, request: AllocationRequest) -> AllocationResponse:
+    async def resolve_roster(self, request) -> Roster:
+        """stored roster when the request names one, else an ad-hoc roster from the inline faculty list."""
+        if request.roster_id:
+            return await self.rosters.get(request.roster_id, request.roster_version)
+        if not request.available_faculty:
+            raise ValueError("provide available_faculty or roster_id")
+        return Roster("inline", 0, request.available_faculty)
+
+    async def allocate(self, request: AllocationRequest) -> AllocationResponse:
         """allocates best faculty to student based on internship match."""
         student_data = request.student.model_dump()
-        faculty_data = [f.model_dump() for f in request.available_faculty]
+        roster = await self.resolve_roster(request)
+        ranked = roster.ranker.rank(request.student, self.top_k, roster.candidates(request.student))
+        local_scores = [{"faculty_id": f.id, "faculty_name": f.name, "score": s} for f, s in ranked]
+        faculty_data = [
+            {"id": f.id, "name": f.name, "expertise": f.expertise, "interests": f.interests, "local_score": s}
+            for f, s in ranked
+        ]
         
-        ai_res = self.ai.match_guide(student_data, faculty_data)
+        ai_res, fallback_reason = await self._ai_call(self.ai.match_guide(student_data, faculty_data), "match")
         matches = ai_res.get("ranked_matches", [])
         
         best_candidate = None
         highest_score = -1
         final_reasoning = "no suitable faculty found."
-        is_random = False
+        is_fallback = False
+        local_alternatives = []
 
         if matches:
             for m in matches:
                 fac_id = m.get("faculty_id")
                 expertise_score = float(m.get("expertise_score", 0))
                 
-                faculty = next((f for f in request.available_faculty if f.id == fac_id), None)
+                faculty = roster.by_id.get(fac_id)
                 if not faculty: continue
 
-                if faculty.max_capacity > 0:
-                    workload_score = ((faculty.max_capacity - faculty.current_load) / faculty.max_capacity) * 100
-                    workload_score = max(0, workload_score)
-                else:
-                    workload_score = 0
+                workload_score = self._workload_score(faculty)
 
                 # weighted: 80% expertise, 20% workload
                 final_score = (expertise_score * 0.8) + (workload_score * 0.2)
@@ -43,20 +105,26 @@ class AllocationEngine:
                     best_candidate = faculty
                     final_reasoning = f"{m.get('reasoning')} | expertise: {expertise_score}, load: {faculty.current_load}/{faculty.max_capacity}"
 
-        # fallback if scores too low or ai failed
+        # fallback if scores too low, ai failed or ai ran past the latency budget
         if not best_candidate or highest_score < 40:
-             available = [f for f in request.available_faculty if f.current_load < f.max_capacity]
-             if available:
-                 best_candidate = random.choice(available)
-                 is_random = True
-                 final_reasoning = "fallback: random selection due to low ai confidence or full capacity."
-                 highest_score = 0
+             fallback_reason = fallback_reason or "low_confidence"
+             local = self._local_ranking(roster, request.student)
+             if local:
+                 highest_score, expertise_score, best_candidate = local[0]
+                 is_fallback = True
+                 final_reasoning = (f"fallback ({fallback_reason}): best local expertise/workload match | "
+                                    f"expertise: {expertise_score}, load: {best_candidate.current_load}/{best_candidate.max_capacity}")
+                 local_alternatives = [
+                     {"faculty_id": f.id, "faculty_name": f.name, "score": score} for score, _, f in local[1:4]
+                 ]
              else:
                  final_reasoning = "all faculty are at full capacity."
+        else:
+             fallback_reason = None
 
         # collect alternatives (top 3 excluding best)
-        alternatives = []
-        if matches:
+        alternatives = local_alternatives
+        if matches and not local_alternatives:
             sorted_matches = sorted(matches, key=lambda x: float(x.get('expertise_score', 0)), reverse=True)
             for m in sorted_matches:
                  if best_candidate and m.get('faculty_id') == best_candidate.id:
@@ -66,7 +134,7 @@ class AllocationEngine:
                  
                  fname = m.get('faculty_name', 'unknown')
                  if not fname or fname == "unknown":
-                     fac = next((f for f in request.available_faculty if f.id == m.get('faculty_id')), None)
+                     fac = roster.by_id.get(m.get('faculty_id'))
                      if fac: fname = fac.name
                  
                  alternatives.append({
@@ -81,8 +149,11 @@ class AllocationEngine:
                 faculty_name=best_candidate.name,
                 confidence_score=round(highest_score, 1),
                 reasoning=final_reasoning,
-                is_random_fallback=is_random,
-                alternatives=alternatives
+                is_random_fallback=is_fallback,
+                fallback_reason=fallback_reason,
+                alternatives=alternatives,
+                local_scores=local_scores,
+                roster_version=roster.version or None
             )
         else:
             return AllocationResponse(
@@ -91,10 +162,58 @@ class AllocationEngine:
                 confidence_score=0,
                 reasoning=final_reasoning,
                 is_random_fallback=True,
-                alternatives=alternatives
+                fallback_reason=fallback_reason,
+                alternatives=alternatives,
+                local_scores=local_scores,
+                roster_version=roster.version or None
             )
 
-    def validate_pair(self, student: dict, faculty: dict) -> dict:
+    async def allocate_cohort(self, request: CohortAllocationRequest) -> CohortAllocationResponse:
+        """globally optimal cohort allocation under faculty capacity (no llm calls)."""
+        roster = await self.resolve_roster(request)
+        return await asyncio.to_thread(self._solve_cohort, request, roster)
+
+    def _solve_cohort(self, request: CohortAllocationRequest, roster: Roster) -> CohortAllocationResponse:
+        """assignment problem on expanded capacity slots: faculty j with r free places becomes r columns,
+        slot k valued 0.8*expertise + 0.2*workload-after-k, solved with the hungarian method."""
+        start = time.perf_counter()
+        students, faculty = request.students, roster.faculty
+        expertise = roster.ranker.score_matrix(students)
+
+        slot_faculty, slot_workload = [], []
+        for j, f in enumerate(faculty):
+            free = min(max(0, f.max_capacity - f.current_load), len(students))
+            for k in range(free):
+                slot_faculty.append(j)
+                slot_workload.append((f.max_capacity - (f.current_load + k)) / f.max_capacity * 100)
+        slot_faculty = np.array(slot_faculty, dtype=np.int64)
+        value = expertise[:, slot_faculty] * 0.8 + np.array(slot_workload, dtype=np.float32) * 0.2
+        build = time.perf_counter() - start
+
+        rows, cols = linear_sum_assignment(value, maximize=True) if value.size else ([], [])
+        solve = time.perf_counter() - start - build
+
+        load = {f.id: f.current_load for f in faculty}
+        by_student = {}
+        for i, c in zip(rows, cols):
+            f = faculty[slot_faculty[c]]
+            load[f.id] += 1
+            by_student[i] = CohortAssignment(
+                student_id=students[i].id, faculty_id=f.id, faculty_name=f.name,
+                expertise_score=round(float(expertise[i, slot_faculty[c]]), 1), score=round(float(value[i, c]), 1)
+            )
+        assignments = [by_student.get(i) or CohortAssignment(student_id=s.id) for i, s in enumerate(students)]
+        return CohortAllocationResponse(
+            assignments=assignments,
+            unassigned=[a.student_id for a in assignments if a.faculty_id is None],
+            total_score=round(sum(a.score for a in assignments), 1),
+            faculty_load=load,
+            build_ms=round(build * 1000, 2),
+            solve_ms=round(solve * 1000, 2),
+            roster_version=roster.version or None,
+        )
+
+    async def validate_pair(self, student: dict, faculty: dict) -> dict:
         """validates a specific student-faculty pair (manual override check)."""
         prompt = f"""
 validate if this faculty is suitable for this student's internship.
@@ -110,4 +229,29 @@ output json:
     "reasoning": "brief explanation"
 }}
 """
-        return self.ai._generate_with_fallback(prompt)
+        res, fallback_reason = await self._ai_call(self.ai._generate_with_fallback(prompt), "validate")
+        if fallback_reason:
+            return self._local_pair_check(student, faculty, fallback_reason)
+        return res
+
+    def _local_pair_check(self, student: dict, faculty: dict, reason: str) -> dict:
+        """keyword-similarity verdict used when the ai is unavailable or over budget."""
+        as_list = lambda v: v if isinstance(v, list) else [str(v)] if v else []
+        profile = FacultyProfile(
+            id=str(faculty.get("id", "faculty")), name=str(faculty.get("name", "")), department=str(faculty.get("department", "")),
+            expertise=as_list(faculty.get("expertise")), interests=as_list(faculty.get("interests")),
+        )
+        stud = StudentProfile(
+            id=str(student.get("id", "student")), name=str(student.get("name", "")),
+            internship_role=str(student.get("internship_role") or ""),
+            internship_description=str(student.get("internship_description") or ""),
+            skills=as_list(student.get("skills")),
+        )
+        score = round(float(FacultyRanker([profile]).score_matrix([stud])[0, 0]), 1)
+        return {
+            "is_suitable": score >= 40,
+            "score": score,
+            "warning": f"ai check unavailable ({reason}); local keyword similarity used",
+            "reasoning": f"local expertise similarity {score}/100",
+            "fallback_reason": reason,
+        }
@@ -0,0 +1,58 @@
+import os
+import logging
+from fastapi import Depends, Request
+from app.core.http_client import get_http_client
+from app.engine.factory import get_ai_provider
+from app.engine.scraper import WebScraper
+from app.engine.lookup_engine import LookupEngine
+from app.engine.sentiment_engine import SentimentEngine
+from app.engine.pipeline_orchestrator import PipelineOrchestrator
+from app.engine.allocation_engine import AllocationEngine
+from app.engine.faculty_roster import FacultyRosterRegistry
+
+logger = logging.getLogger(__name__)
+
+class EngineContainer:
+    """shared engine instances, built once per worker in the app lifespan."""
+
+    WARM_URLS = ["https://html.duckduckgo.com/html/"]
+
+    def __init__(self):
+        self.ai = get_ai_provider()
+        self.scraper = WebScraper()
+        self.lookup_engine = LookupEngine(self.scraper)
+        self.sentiment = SentimentEngine(self.scraper, self.ai)
+        self.orchestrator = PipelineOrchestrator(self.lookup_engine, self.scraper, self.sentiment)
+        self.rosters = FacultyRosterRegistry()
+        self.allocation = AllocationEngine(self.ai, self.rosters)
+
+    async def warm_up(self) -> None:
+        """opens the http pool and pre-connects to search hosts (best effort)."""
+        client = get_http_client()
+        if os.getenv("HTTP_PREWARM", "true").lower() not in ("1", "true", "yes"):
+            return
+        for url in self.WARM_URLS:
+            try:
+                await client.head(url, headers=self.scraper._get_headers(), timeout=2)
+            except Exception as e:
+                logger.warning(f"prewarm {url}: {e}")
+        logger.info("engines warmed")
+
+def get_engines(request: Request) -> EngineContainer:
+    """returns the lifespan container (built lazily if the lifespan did not run)."""
+    engines = getattr(request.app.state, "engines", None)
+    if engines is None:
+        engines = request.app.state.engines = EngineContainer()
+    return engines
+
+def get_orchestrator(engines: EngineContainer = Depends(get_engines)) -> PipelineOrchestrator:
+    return engines.orchestrator
+
+def get_ai(engines: EngineContainer = Depends(get_engines)):
+    return engines.ai
+
+def get_jobs(engines: EngineContainer = Depends(get_engines)):
+    return engines.orchestrator.jobs
+
+def get_allocation_engine(engines: EngineContainer = Depends(get_engines)) -> AllocationEngine:
+    return engines.allocation
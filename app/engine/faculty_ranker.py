@@ -0,0 +1,79 @@
+import re
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.schemas.allocation import FacultyProfile, StudentProfile
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it", "of",
+    "on", "or", "our", "the", "to", "we", "will", "with", "you", "your", "intern", "internship", "role",
+    "work", "working", "team", "using",
+}
+
+def tokenize(text: str) -> List[str]:
+    """lowercase word tokens (keeps c++, c#, node.js), stopwords dropped."""
+    tokens = (t.rstrip(".") for t in _TOKEN_RE.findall((text or "").lower()))
+    return [t for t in tokens if t and t not in _STOPWORDS]
+
+def faculty_terms(faculty: FacultyProfile) -> List[str]:
+    """expertise counts double: it is the primary match signal, interests secondary."""
+    expertise = tokenize(" ".join(faculty.expertise))
+    return expertise * 2 + tokenize(" ".join(faculty.interests))
+
+def student_terms(student: StudentProfile) -> List[str]:
+    return tokenize(" ".join([student.internship_role, student.internship_description, " ".join(student.skills)]))
+
+class FacultyRanker:
+    """tf-idf cosine similarity between students and a faculty list (one matrix product per batch)."""
+
+    def __init__(self, faculty: Sequence[FacultyProfile]):
+        self.faculty = list(faculty)
+        docs = [faculty_terms(f) for f in self.faculty]
+        self.vocab: Dict[str, int] = {}
+        for terms in docs:
+            for t in terms:
+                self.vocab.setdefault(t, len(self.vocab))
+
+        tf = np.zeros((len(docs), len(self.vocab)), dtype=np.float32)
+        for row, terms in enumerate(docs):
+            for t in terms:
+                tf[row, self.vocab[t]] += 1
+        df = np.count_nonzero(tf, axis=0)
+        # smoothed idf: terms every faculty shares still count a little
+        self.idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+        self.matrix = self._normalize(np.log1p(tf) * self.idf)
+
+    @staticmethod
+    def _normalize(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+    def _vectorize(self, students: Sequence[StudentProfile]) -> np.ndarray:
+        q = np.zeros((len(students), len(self.vocab)), dtype=np.float32)
+        for row, student in enumerate(students):
+            for t in student_terms(student):
+                col = self.vocab.get(t)
+                if col is not None:
+                    q[row, col] += 1
+        return self._normalize(np.log1p(q) * self.idf)
+
+    def score_matrix(self, students: Sequence[StudentProfile]) -> np.ndarray:
+        """students x faculty similarity, 0-100."""
+        if not self.faculty or not students:
+            return np.zeros((len(students), len(self.faculty)), dtype=np.float32)
+        return (self._vectorize(students) @ self.matrix.T) * 100
+
+    def rank(self, student: StudentProfile, top_k: int = 0,
+             candidates: Optional[np.ndarray] = None) -> List[Tuple[FacultyProfile, float]]:
+        """faculty by descending local score (ties broken by id); top_k <= 0 returns all.
+        `candidates` (e.g. from an inverted index) limits scoring to those rows; the rest score 0."""
+        if candidates is None:
+            scores = self.score_matrix([student])[0]
+        else:
+            scores = np.zeros(len(self.faculty), dtype=np.float32)
+            if len(candidates) and self.vocab:
+                scores[candidates] = (self.matrix[candidates] @ self._vectorize([student])[0]) * 100
+        order = sorted(range(len(self.faculty)), key=lambda i: (-round(float(scores[i]), 4), self.faculty[i].id))
+        if top_k > 0:
+            order = order[:top_k]
+        return [(self.faculty[i], round(float(scores[i]), 1)) for i in order]
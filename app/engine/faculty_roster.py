@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from app.schemas.allocation import FacultyProfile, StudentProfile
+from app.engine.faculty_ranker import FacultyRanker, tokenize, student_terms
+from app.core.database import async_session
+from app.models.allocation import FacultyRosterVersion
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+class RosterNotFound(KeyError):
+    pass
+
+class Roster:
+    """one immutable roster version with its lookup structures built once."""
+
+    def __init__(self, roster_id: str, version: int, faculty: List[FacultyProfile], updated_at: float = None):
+        self.roster_id = roster_id
+        self.version = version
+        self.faculty = list(faculty)
+        self.updated_at = updated_at or time.time()
+        self.by_id: Dict[str, FacultyProfile] = {f.id: f for f in self.faculty}
+        self.index: Dict[str, Set[int]] = {}  # expertise/interest term -> faculty positions
+        for pos, f in enumerate(self.faculty):
+            for term in set(tokenize(" ".join(f.expertise + f.interests))):
+                self.index.setdefault(term, set()).add(pos)
+        self.ranker = FacultyRanker(self.faculty)
+
+    def candidates(self, student: StudentProfile) -> np.ndarray:
+        """positions of faculty sharing at least one term with the student."""
+        found: Set[int] = set()
+        for term in set(student_terms(student)):
+            found |= self.index.get(term, set())
+        return np.array(sorted(found), dtype=np.int64)
+
+    def summary(self) -> Dict:
+        return {
+            "roster_id": self.roster_id, "version": self.version, "faculty_count": len(self.faculty),
+            "terms": len(self.index), "updated_at": self.updated_at,
+        }
+
+class FacultyRosterRegistry:
+    """versioned faculty rosters stored in the faculty_rosters table; parsed versions are kept indexed in memory."""
+
+    def __init__(self):
+        self.max_loaded = int(os.getenv("ROSTER_CACHE_SIZE", "32"))
+        self._loaded: "OrderedDict[tuple, Roster]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    async def _latest_version(db, roster_id: str) -> int:
+        stmt = select(func.max(FacultyRosterVersion.version)).where(FacultyRosterVersion.roster_id == roster_id)
+        return (await db.execute(stmt)).scalar() or 0
+
+    async def get(self, roster_id: str, version: Optional[int] = None) -> Roster:
+        """roster at `version` (latest when None)."""
+        async with async_session() as db:
+            version = version or await self._latest_version(db, roster_id)
+            key = (roster_id, version)
+            with self._lock:
+                roster = self._loaded.get(key)
+            if roster is None:
+                row = None
+                if version:
+                    row = (await db.execute(select(FacultyRosterVersion).where(
+                        FacultyRosterVersion.roster_id == roster_id, FacultyRosterVersion.version == version
+                    ))).scalars().first()
+                if row is None:
+                    raise RosterNotFound(f"roster {roster_id} version {version or 'latest'} not found")
+                faculty = [FacultyProfile(**f) for f in row.faculty]
+                roster = await asyncio.to_thread(Roster, roster_id, version, faculty, row.updated_at)
+        self._remember(key, roster)
+        return roster
+
+    async def upsert(self, roster_id: str, faculty: List[FacultyProfile], replace: bool = False) -> Roster:
+        """new version: faculty merged by id into the latest one (or replacing it entirely)."""
+        for attempt in range(3):
+            async with async_session() as db:
+                latest = await self._latest_version(db, roster_id)
+                merged: Dict[str, FacultyProfile] = {}
+                if latest and not replace:
+                    merged = dict((await self.get(roster_id, latest)).by_id)
+                for f in faculty:
+                    merged[f.id] = f
+
+                roster = await asyncio.to_thread(Roster, roster_id, latest + 1, list(merged.values()))
+                db.add(FacultyRosterVersion(roster_id=roster_id, version=roster.version,
+                                            faculty=[f.model_dump() for f in roster.faculty],
+                                            updated_at=roster.updated_at))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # another worker stored this version first: merge into theirs
+                    await db.rollback()
+                    logger.warning(f"roster {roster_id} v{roster.version} taken, retrying")
+                    continue
+            self._remember((roster_id, roster.version), roster)
+            logger.info(f"roster {roster_id} v{roster.version}: {len(roster.faculty)} faculty, {len(roster.index)} terms")
+            return roster
+        raise RuntimeError(f"roster {roster_id}: concurrent updates, try again")
+
+    def _remember(self, key: tuple, roster: Roster) -> None:
+        with self._lock:
+            self._loaded[key] = roster
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
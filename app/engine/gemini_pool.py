@@ -0,0 +1,133 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from google.ai import generativelanguage as glm
+from google.api_core.client_options import ClientOptions
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """continuously refilling bucket: `per_minute` units/min, burst up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def headroom(self) -> float:
+        """fraction of the bucket currently available (can be negative after overdraw)."""
+        self._refill()
+        return self.tokens / self.capacity
+
+    def wait_time(self, amount: float) -> float:
+        """seconds until `amount` units are available."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+class KeySlot:
+    """one api key with its own async client and rpm/tpm limiters."""
+
+    def __init__(self, index: int, api_key: str, rpm: float, tpm: float):
+        self.index = index
+        self.api_key = api_key
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self._client: Optional[glm.GenerativeServiceAsyncClient] = None
+
+    @property
+    def client(self) -> glm.GenerativeServiceAsyncClient:
+        # created lazily so the grpc channel binds to the running event loop
+        if self._client is None:
+            self._client = glm.GenerativeServiceAsyncClient(client_options=ClientOptions(api_key=self.api_key))
+        return self._client
+
+    def headroom(self) -> float:
+        return min(self.rpm.headroom(), self.tpm.headroom())
+
+    def wait_time(self, tokens: float) -> float:
+        cooldown = max(0.0, self.cooldown_until - time.monotonic())
+        return max(cooldown, self.rpm.wait_time(1), self.tpm.wait_time(tokens))
+
+class GeminiKeyPool:
+    """schedules each request onto the configured key with the most rate-limit headroom."""
+
+    def __init__(self, api_keys: List[str]):
+        rpm = float(os.getenv("GEMINI_RPM", "15"))
+        tpm = float(os.getenv("GEMINI_TPM", "1000000"))
+        self.cooldown = float(os.getenv("GEMINI_429_COOLDOWN", "30"))
+        self.slots = [KeySlot(i, k, rpm, tpm) for i, k in enumerate(api_keys)]
+
+    @staticmethod
+    def estimate_tokens(prompt: str, expected_output: int = 512) -> int:
+        """rough prompt+completion estimate (~4 chars per token)."""
+        return len(prompt) // 4 + expected_output
+
+    async def acquire(self, tokens: int) -> KeySlot:
+        """waits until some key can take the request, then reserves 1 request + `tokens` on it."""
+        if not self.slots:
+            raise RuntimeError("no gemini api keys configured")
+        while True:
+            ready = [s for s in self.slots if s.wait_time(tokens) == 0]
+            if ready:
+                slot = max(ready, key=lambda s: s.headroom())
+                slot.rpm.take(1)
+                slot.tpm.take(tokens)
+                return slot
+            # no check/take gap: both happen without an await, so the loop is race-free
+            await asyncio.sleep(min(min(s.wait_time(tokens) for s in self.slots), 1.0))
+
+    async def generate(self, slot: KeySlot, model_name: str, prompt: str, timeout: float) -> glm.GenerateContentResponse:
+        """one generate_content call on the slot's own client (not the process-wide genai.configure key)."""
+        return await slot.client.generate_content(
+            model=f"models/{model_name}",
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+            timeout=timeout,
+        )
+
+    @staticmethod
+    def response_text(resp: glm.GenerateContentResponse) -> str:
+        """text of the first candidate ("" when the response was blocked or empty)."""
+        if not resp.candidates:
+            return ""
+        return "".join(part.text for part in resp.candidates[0].content.parts)
+
+    def record_usage(self, slot: KeySlot, estimated: int, actual: Optional[int]) -> None:
+        """settles the tpm reservation against the reported token count."""
+        if actual:
+            slot.tpm.take(actual - estimated)
+
+    def penalize(self, slot: KeySlot) -> None:
+        """429 on this key: drain its request bucket and park it for the cooldown."""
+        slot.rpm.drain()
+        slot.cooldown_until = time.monotonic() + self.cooldown
+        logger.warning(f"gemini key #{slot.index + 1} rate limited, cooling down {self.cooldown}s")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "key": s.index + 1,
+                "rpm_available": round(s.rpm.headroom() * s.rpm.capacity, 2),
+                "tpm_available": round(s.tpm.headroom() * s.tpm.capacity),
+                "cooldown_s": round(max(0.0, s.cooldown_until - now), 1),
+            }
+            for s in self.slots
+        ]
@@ -1,19 +1,25 @@
 import os
 import json
 import time
+import asyncio
 import hashlib
 import logging
-import google.generativeai as genai
 from typing import Dict, Any, List, Optional
-from app.core.cache import cache_get, cache_set
+from app.core.cache import cache_get_async, cache_set_async
+from app.core import metrics
+from app.engine.gemini_pool import GeminiKeyPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GeminiProvider:
     """handles all gemini ai calls with retry, caching, and key rotation."""
+
+    BACKOFF_BASE = 0.2  # seconds, doubled per transient error
+    BACKOFF_MAX = 2.0
     
     def __init__(self):
+        self.timeout = float(os.getenv("GEMINI_TIMEOUT", "15"))
         self.api_keys = []
         
         k1 = os.getenv("GEMINI_API_KEY")
@@ -28,11 +34,12 @@ class GeminiProvider:
             
         if not self.api_keys:
             logger.warning("no gemini api keys found. ai features disabled.")
-            self.current_key_index = 0
         else:
             logger.info(f"loaded {len(self.api_keys)} gemini api keys.")
-            self.current_key_index = 0
-            self._configure_client()
+
+        # one client + rate limiter per key; calls go to the key with most headroom
+        self.pool = GeminiKeyPool(self.api_keys)
+        metrics.register_gauge("gemini.keys", self.pool.stats)
 
         # available models - ordered by speed/capability
         self.models = [
@@ -43,57 +50,62 @@ class GeminiProvider:
             "gemini-2.5-pro-preview-05-06",    # pro preview
         ]
 
-    def _configure_client(self):
-        """configures genai with current api key."""
-        if self.api_keys:
-            key = self.api_keys[self.current_key_index]
-            genai.configure(api_key=key)
-
-    def _rotate_key(self):
-        """rotates to next api key on quota errors."""
-        if len(self.api_keys) > 1:
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            self._configure_client()
-            logger.info(f"rotated to api key #{self.current_key_index + 1}")
-
     def _get_cache_key(self, prompt: str) -> str:
         """generates cache key from prompt hash."""
         return hashlib.md5(prompt.encode('utf-8')).hexdigest()
 
-    def _generate_with_fallback(self, prompt: str, cache_ttl: int = 86400) -> Dict[str, Any]:
-        """fast generation with proper model fallback and redis cache."""
+    async def _generate_with_fallback(self, prompt: str, cache_ttl: int = 86400) -> Dict[str, Any]:
+        """async generation with model fallback, non-blocking backoff and redis cache."""
         cache_key = f"gemini:{self._get_cache_key(prompt)}"
         
-        cached = cache_get(cache_key)
+        cached = await cache_get_async(cache_key)
         if cached:
             return cached
 
         errors = []
+        transient = 0
+        est_tokens = self.pool.estimate_tokens(prompt)
         
         for model_name in self.models:
             try:
-                model = genai.GenerativeModel(model_name)
-                resp = model.generate_content(
-                    prompt,
-                    request_options={"timeout": 15}
+                slot = await asyncio.wait_for(self.pool.acquire(est_tokens), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                # every key is out of headroom; other models share the same quota
+                errors.append(f"rate limited: no key available within {self.timeout}s")
+                break
+            except Exception as e:
+                errors.append(str(e)[:50])
+                break
+
+            try:
+                # wait_for cancels the in-flight call on timeout; CancelledError propagates untouched
+                resp = await asyncio.wait_for(
+                    self.pool.generate(slot, model_name, prompt, self.timeout),
+                    timeout=self.timeout
                 )
+                usage = getattr(resp, "usage_metadata", None)
+                self.pool.record_usage(slot, est_tokens, getattr(usage, "total_token_count", None))
                 
-                result = self._parse_json(resp.text)
+                result = self._parse_json(self.pool.response_text(resp))
                 if result and not result.get("error"):
-                    cache_set(cache_key, result, cache_ttl)
+                    await cache_set_async(cache_key, result, cache_ttl)
                     logger.info(f"success with {model_name}")
                     return result
                     
+            except asyncio.TimeoutError:
+                errors.append(f"{model_name}: timeout after {self.timeout}s")
+                continue
             except Exception as e:
                 err_str = str(e)
                 errors.append(f"{model_name}: {err_str[:50]}")
                 
                 if "429" in err_str or "quota" in err_str.lower():
-                    self._rotate_key()
+                    self.pool.penalize(slot)
                     logger.warning(f"{model_name} quota hit, trying next model...")
                     continue  # immediately try next model
                 elif "500" in err_str or "503" in err_str:
-                    time.sleep(0.2)
+                    await asyncio.sleep(min(self.BACKOFF_BASE * (2 ** transient), self.BACKOFF_MAX))
+                    transient += 1
                     continue
                 else:
                     continue  # try next model on any error
@@ -101,13 +113,13 @@ class GeminiProvider:
         logger.error(f"all {len(errors)} models failed")
         return {"error": "all models failed", "details": errors}
 
-    def analyze_company(self, company_name: str, layer1_data: Dict[str, Any], reputation_data: list) -> Dict[str, Any]:
+    async def analyze_company(self, company_name: str, layer1_data: Dict[str, Any], reputation_data: list) -> Dict[str, Any]:
         """ai analysis of company legitimacy."""
         if not self.api_keys:
             return {"trust_score": 50, "analysis": "skipped (no key)", "flags": []}
 
         prompt = self._build_company_prompt(company_name, layer1_data, reputation_data)
-        result = self._generate_with_fallback(prompt)
+        result = await self._generate_with_fallback(prompt)
         
         if result.get("error"):
             return {
@@ -118,7 +130,7 @@ class GeminiProvider:
             }
         return result
 
-    def extract_company_input(self, raw_text: str) -> Dict[str, Any]:
+    async def extract_company_input(self, raw_text: str) -> Dict[str, Any]:
         """extracts company registration details from document."""
         if not self.api_keys:
             return {}
@@ -143,7 +155,7 @@ output json:
 }}
 """
         
-        data = self._generate_with_fallback(prompt)
+        data = await self._generate_with_fallback(prompt)
         if data.get("error"):
             return {"error": data["error"]}
 
@@ -158,7 +170,7 @@ output json:
         
         return data
 
-    def extract_offer_details(self, raw_text: str) -> Dict[str, Any]:
+    async def extract_offer_details(self, raw_text: str) -> Dict[str, Any]:
         """extracts offer letter details."""
         if not self.api_keys:
             return {}
@@ -182,10 +194,14 @@ output json:
 }}
 """
         
-        data = self._generate_with_fallback(prompt)
+        data = await self._generate_with_fallback(prompt)
         if data.get("error"):
             return {"error": data["error"]}
 
+        return self._validate_offer_details(data)
+
+    def _validate_offer_details(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """flags offer extractions missing critical fields."""
         required = ["name", "country", "hr_name", "hr_email", "role"]
         missing = [f for f in required if not data.get(f)]
         
@@ -194,7 +210,7 @@ output json:
         
         return data
 
-    def verify_internship_relevance(self, raw_text: str, student_context: str) -> Dict[str, Any]:
+    async def verify_internship_relevance(self, raw_text: str, student_context: str) -> Dict[str, Any]:
         """checks if internship is relevant to student's academic programme."""
         if not self.api_keys:
             return {"is_relevant": False, "error": "no api key"}
@@ -234,9 +250,30 @@ output json:
 }}
 """
         
-        return self._generate_with_fallback(prompt)
-
-    def match_guide(self, student_json: Dict[str, Any], faculty_list: list) -> Dict[str, Any]:
+        return await self._generate_with_fallback(prompt)
+
+    async def analyze_offer_letter(self, raw_text: str, student_context: str) -> Dict[str, Any]:
+        """offer extraction + relevance verdict, fused into one call when enabled (falls back to both calls concurrently)."""
+        start = time.perf_counter()
+        fused = os.getenv("GEMINI_FUSED_OFFER", "true").lower() in ("1", "true", "yes")
+
+        if fused and self.api_keys:
+            data = await self._generate_with_fallback(self._build_offer_prompt(raw_text, student_context))
+            extracted = data.get("extracted_data")
+            relevance = data.get("relevance_analysis")
+            if not data.get("error") and isinstance(extracted, dict) and isinstance(relevance, dict):
+                metrics.observe("offer_analysis.fused", time.perf_counter() - start)
+                return {"extracted_data": self._validate_offer_details(extracted), "relevance_analysis": relevance, "mode": "fused"}
+            logger.warning(f"fused offer analysis failed, splitting: {data.get('error', 'incomplete json')}")
+
+        extracted, relevance = await asyncio.gather(
+            self.extract_offer_details(raw_text),
+            self.verify_internship_relevance(raw_text, student_context)
+        )
+        metrics.observe("offer_analysis.split", time.perf_counter() - start)
+        return {"extracted_data": extracted, "relevance_analysis": relevance, "mode": "split"}
+
+    async def match_guide(self, student_json: Dict[str, Any], faculty_list: list) -> Dict[str, Any]:
         """matches student to best faculty guides based on expertise and interests."""
         if not self.api_keys:
             return {}
@@ -249,8 +286,8 @@ role: {student_json.get('internship_role')}
 description: {student_json.get('internship_description')}
 skills: {student_json.get('skills')}
 
-FACULTY LIST (includes expertise and interests):
-{json.dumps(faculty_list, indent=2)}
+FACULTY LIST (pre-ranked candidates; local_score is a keyword similarity hint 0-100):
+{json.dumps(faculty_list, separators=(",", ":"))}
 
 MATCHING CRITERIA:
 1. expertise match: faculty's area of expertise aligns with student's internship role/skills
@@ -272,7 +309,7 @@ output json:
 }}
 """
 
-        return self._generate_with_fallback(prompt)
+        return await self._generate_with_fallback(prompt)
 
     def _build_company_prompt(self, name: str, l1: Dict[str, Any], rep: list) -> str:
         """builds prompt for company analysis."""
@@ -304,6 +341,56 @@ output json:
     "analysis": "brief summary",
     "flags": ["list of concerns if any"]
 }}
+"""
+
+    def _build_offer_prompt(self, raw_text: str, student_context: str) -> str:
+        """single prompt covering extract_offer_details + verify_internship_relevance."""
+        return f"""
+you are an academic internship coordinator. analyze this job/internship offer letter: extract its details
+and determine if it is relevant for the student.
+
+STUDENT PROGRAMME: {student_context}
+
+OFFER LETTER TEXT:
+{raw_text[:4000]}
+
+TASK:
+1. extract company name, country, signatory/hr name, sender email and the job title offered.
+2. extract the core subjects from the student's programme name:
+   - "bsc computer science, statistics and mathematics" → computer science, statistics, mathematics
+   - "btech mechanical engineering" → mechanical engineering
+   - "msc data science" → data science, statistics, machine learning
+
+3. determine relevance by checking if the role aligns with career paths for those subjects:
+   - software/web dev, data analyst, ml engineer → relevant for cs, statistics, math
+   - finance analyst, actuarial → relevant for statistics, math, economics
+   - mechanical design, cad → relevant for mechanical engineering
+   
+4. flag as NOT relevant if:
+   - role is "campus ambassador", "social media marketing", "data entry" for technical programmes
+   - role is mlm/pyramid scheme type
+   - role has zero connection to any subject in the programme
+
+output json:
+{{
+    "extracted_data": {{
+        "name": "company legal name",
+        "country": "country",
+        "hr_name": "signatory/hr name",
+        "hr_email": "sender email",
+        "role": "job title offered",
+        "stipend_mentioned": true/false,
+        "is_offer_letter": true/false,
+        "missing_fields": ["list of missing critical fields"]
+    }},
+    "relevance_analysis": {{
+        "is_relevant": true/false,
+        "confidence_score": 0-100,
+        "detected_role": "extracted job title",
+        "detected_subjects": ["subjects extracted from programme"],
+        "reasoning": "one line explanation"
+    }}
+}}
 """
 
     def _parse_json(self, text: str) -> Dict[str, Any]:
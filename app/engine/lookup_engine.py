@@ -3,15 +3,17 @@ import logging
 import asyncio
 from app.engine.providers import ZaubaProvider, OpenCorporatesProvider
 from app.engine.pdl_provider import PeopleDataLabsProvider
+from app.engine.scraper import WebScraper
 
 logger = logging.getLogger(__name__)
 
 class LookupEngine:
     """registry lookups - all searches run in parallel"""
 
-    def __init__(self):
-        self.zauba = ZaubaProvider()
-        self.opencorps = OpenCorporatesProvider()
+    def __init__(self, scraper: Optional[WebScraper] = None):
+        scraper = scraper or WebScraper()
+        self.zauba = ZaubaProvider(scraper)
+        self.opencorps = OpenCorporatesProvider(scraper)
         self.pdl = PeopleDataLabsProvider()
 
     async def check_registry_and_metadata(self, name: str, country: str, registration_id: Optional[str], linkedin_url: str = None, website: str = None) -> tuple[Dict[str, Any], Dict[str, Any]]:
@@ -19,11 +21,11 @@ class LookupEngine:
         async def do_registry():
             if not registration_id: return {}
             provider = self._get_provider(country)
-            return await asyncio.to_thread(provider.check_registry_signal, registration_id, name)
+            return await provider.check_registry_signal(registration_id, name)
 
         async def do_pdl():
             try:
-                return await asyncio.to_thread(self.pdl.check_registry_signal, registration_id or "", name, linkedin_url, website)
+                return await self.pdl.check_registry_signal(registration_id or "", name, linkedin_url, website)
             except Exception as e:
                 logger.error(f"pdl: {e}")
                 return {}
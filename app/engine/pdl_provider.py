@@ -1,8 +1,9 @@
 import os
-import requests
+import asyncio
+import httpx
 import logging
 from typing import Optional, Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor
+from app.core.http_client import get_http_client
 from app.engine.registry_provider import RegistryProvider
 
 logger = logging.getLogger(__name__)
@@ -11,11 +12,16 @@ class PeopleDataLabsProvider(RegistryProvider):
     """pdl enrichment - parallel queries"""
     BASE_URL = "https://api.peopledatalabs.com/v5/company/search"
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = os.getenv("PDL_API_KEY")
+        self._client = client
         if not self.api_key:
             logger.warning("no pdl api key")
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
     def verify_by_id(self, registration_id: str, company_name: str = "") -> Optional[Dict[str, Any]]:
         return None
 
@@ -27,14 +33,14 @@ class PeopleDataLabsProvider(RegistryProvider):
             if clean.endswith(s): clean = clean[:-len(s)]
         return clean.strip()
 
-    def check_registry_signal(self, registration_id: str, company_name: str, linkedin_url: str = None, website: str = None) -> Dict[str, Any]:
-        matches = self.verify_enriched(company_name, linkedin_url, website)
+    async def check_registry_signal(self, registration_id: str, company_name: str, linkedin_url: str = None, website: str = None) -> Dict[str, Any]:
+        matches = await self.verify_enriched(company_name, linkedin_url, website)
         return {"peopledatalabs.com": {"found": len(matches) > 0, "verification_method": "pdl_api", "search_results": matches}}
 
-    def verify_by_name(self, name: str) -> List[Dict[str, Any]]:
-        return self.verify_enriched(name)
+    async def verify_by_name(self, name: str) -> List[Dict[str, Any]]:
+        return await self.verify_enriched(name)
 
-    def verify_enriched(self, name: str, linkedin_url: str = None, website: str = None) -> List[Dict[str, Any]]:
+    async def verify_enriched(self, name: str, linkedin_url: str = None, website: str = None) -> List[Dict[str, Any]]:
         if not self.api_key: return []
         
         # build all queries
@@ -48,19 +54,17 @@ class PeopleDataLabsProvider(RegistryProvider):
         if clean != name.lower():
             queries.append((f"SELECT * FROM company WHERE name = '{clean}'", "clean_name"))
         
-        # run all queries in parallel, return first match
-        with ThreadPoolExecutor(max_workers=len(queries)) as ex:
-            futures = [ex.submit(self._execute_pdl_query, q, t) for q, t in queries]
-            for future in futures:
-                res = future.result()
-                if res: return res
+        # run all queries in parallel, return first match in priority order
+        results = await asyncio.gather(*(self._execute_pdl_query(q, t) for q, t in queries))
+        for res in results:
+            if res: return res
         return []
 
-    def _execute_pdl_query(self, sql_query: str, qtype: str = "") -> List[Dict[str, Any]]:
+    async def _execute_pdl_query(self, sql_query: str, qtype: str = "") -> List[Dict[str, Any]]:
         try:
             params = {"sql": sql_query, "size": 1, "pretty": False}
             headers = {"X-Api-Key": self.api_key, "Content-Type": "application/json"}
-            resp = requests.get(self.BASE_URL, headers=headers, params=params, timeout=5)
+            resp = await self.client.get(self.BASE_URL, headers=headers, params=params, timeout=5)
             if resp.status_code == 200:
                 data = resp.json().get("data", [])
                 if data:
@@ -2,26 +2,150 @@ from app.engine.lookup_engine import LookupEngine
 from app.engine.scraper import WebScraper
 from app.engine.sentiment_engine import SentimentEngine
 from app.schemas.company import CompanyInput, CredibilityAnalysis
-from app.models.company import Company
+from app.models.company import Company, normalize_company_name
+from app.models.verification import VerificationRecord
+from app.core.singleflight import SingleFlight
+from app.core.job_queue import JobQueue, get_job_queue
+from app.core import metrics, report_store
+from app.core.cache import cache_get_async, cache_set_async
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
-from fastapi import BackgroundTasks
+from typing import Optional, List, Dict, Any, AsyncIterator
+import os
 import logging
 import asyncio
+import json
 import uuid
 
 logger = logging.getLogger(__name__)
 
 class PipelineOrchestrator:
-    """verification: mandatory parallel + optional background"""
+    """verification: mandatory parallel + optional background (durable job queue)"""
 
-    def __init__(self):
-        self.lookup_engine = LookupEngine()
-        self.scraper = WebScraper()
-        self.sentiment = SentimentEngine()
+    CHECKS_JOB = "verification_checks"
 
-    async def run_fast_pipeline(self, input_data: CompanyInput, db: AsyncSession, background_tasks: BackgroundTasks) -> CredibilityAnalysis:
+    def __init__(self, lookup_engine: Optional[LookupEngine] = None, scraper: Optional[WebScraper] = None,
+                 sentiment: Optional[SentimentEngine] = None, jobs: Optional[JobQueue] = None):
+        self.scraper = scraper or WebScraper()
+        self.lookup_engine = lookup_engine or LookupEngine(self.scraper)
+        self.sentiment = sentiment or SentimentEngine(self.scraper)
+        self._jobs = jobs
+        self.job_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        # checked analysis is kept this long so a retried save does not scrape again
+        self.checkpoint_ttl = int(os.getenv("JOB_CHECKPOINT_TTL", "3600"))
+        # identical concurrent verifications share one run (the queue dedupes the background job)
+        self._pipelines = SingleFlight("verify")
+        # stored verdicts younger than this are returned without re-running (0 = always re-run)
+        self.max_age = float(os.getenv("VERIFICATION_MAX_AGE", "86400"))
+
+    @property
+    def jobs(self) -> JobQueue:
+        if self._jobs is None:
+            self._jobs = get_job_queue()
+        return self._jobs
+
+    @staticmethod
+    def _flight_key(input_data: CompanyInput) -> str:
+        """dedup key: normalized name + country + registry id"""
+        name = normalize_company_name(input_data.name)
+        country = (input_data.country or "").lower().strip()
+        reg_id = (input_data.registry_id or "").upper().strip()
+        return f"{name}|{country}|{reg_id}"
+
+    async def run_fast_pipeline(self, input_data: CompanyInput, db: AsyncSession) -> CredibilityAnalysis:
+        """returns a fresh stored verdict if any, else coalesces identical in-flight requests onto one run"""
+        if not input_data.force_refresh:
+            fresh = await self._fresh_verdict(input_data, db)
+            if fresh:
+                return fresh
+        key = self._flight_key(input_data)
+        result, shared = await self._pipelines.do(key, lambda: self._run_fast_pipeline(input_data, db, key))
+        if shared:
+            logger.info(f"coalesced verification: {input_data.name}")
+        return result
+
+    async def _fresh_verdict(self, input_data: CompanyInput, db: Optional[AsyncSession]) -> Optional[CredibilityAnalysis]:
+        """latest profile with the same normalized name (and cin, when given), if verified within max_age"""
+        if self.max_age <= 0:
+            return None
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        # a cin alone is not identity: a different name reusing someone's cin must run the pipeline
+        stmt = select(Company).where(Company.name_key == normalize_company_name(input_data.name),
+                                     Company.verified_at >= cutoff)
+        if input_data.registry_id:
+            stmt = stmt.where(Company.cin == input_data.registry_id.strip())
+        stmt = stmt.order_by(Company.verified_at.desc()).limit(1)
+        try:
+            if db is not None:
+                profile = (await db.execute(stmt)).scalars().first()
+            else:
+                from app.core.database import async_session
+                async with async_session() as own:
+                    profile = (await own.execute(stmt)).scalars().first()
+        except Exception as e:
+            logger.error(f"freshness lookup: {e}")
+            return None
+
+        if not profile:
+            metrics.incr("verify.fresh.miss")
+            return None
+        metrics.incr("verify.fresh.hit")
+        logger.info(f"reusing verdict for {input_data.name} from {profile.verified_at}")
+        verified_at = profile.verified_at.isoformat() if profile.verified_at else None
+        return CredibilityAnalysis(
+            trust_score=profile.ai_trust_score or 0.0,
+            trust_tier=profile.ai_trust_tier or "Needs Review",
+            verification_status=profile.verification_status or "Pending",
+            review_count=0,
+            sentiment_summary=f"stored verification of {profile.company_name} from {verified_at}",
+            scraped_sources=[],
+            red_flags=[],
+            details={
+                "signals": profile.signals or {},
+                "report_path": profile.ai_report_path,
+                "cached": True,
+                "verified_at": verified_at,
+                "note": "Recent stored verdict. Send force_refresh=true to re-run verification.",
+            }
+        )
+
+    async def run_batch(self, items: List[CompanyInput], concurrency: int) -> AsyncIterator[str]:
+        """runs many verifications with bounded concurrency, yielding one ndjson line per input as each finishes"""
+        # identical companies in the batch run once and fan out to every index
+        groups: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            groups.setdefault(self._flight_key(item), []).append(i)
+        logger.info(f"batch: {len(items)} items, {len(groups)} unique, concurrency={concurrency}")
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def run(indexes: List[int]):
+            async with sem:
+                try:
+                    return indexes, await self.run_fast_pipeline(items[indexes[0]], None), None
+                except Exception as e:
+                    logger.error(f"batch item {items[indexes[0]].name}: {e}")
+                    return indexes, None, str(e)
+
+        pending = [asyncio.ensure_future(run(idx)) for idx in groups.values()]
+        try:
+            for fut in asyncio.as_completed(pending):
+                indexes, result, error = await fut
+                for i in indexes:
+                    line = {"index": i, "name": items[i].name}
+                    if error:
+                        line["error"] = error
+                    else:
+                        line["result"] = result.model_dump()
+                    yield json.dumps(line) + "\n"
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+    async def _run_fast_pipeline(self, input_data: CompanyInput, db: AsyncSession, flight_key: str) -> CredibilityAnalysis:
         """mandatory checks (registry only) + ai parallel, ALL scraping in background"""
         logger.info(f"fast pipeline: {input_data.name}")
 
@@ -74,11 +198,13 @@ class PipelineOrchestrator:
         # generate pdf placeholder (will be updated in background)
         report_path = f"reports/{input_data.name.replace(' ', '_')}_Report.pdf"
 
-        # add background task to FastAPI queue
-        background_tasks.add_task(
-            self._run_optional_and_save, 
-            input_data, ai_score, registry_found, email_match, report_path
-        )
+        # durable background job (only the leader of a coalesced group gets here; the queue
+        # returns the existing job while one is still queued/running for this company)
+        payload = {
+            "input": input_data.model_dump(), "base_score": ai_score,
+            "registry_found": registry_found, "email_match": email_match, "report_path": report_path
+        }
+        job_id = await asyncio.to_thread(self.jobs.enqueue, self.CHECKS_JOB, payload, flight_key, self.job_attempts)
 
         # return full object (pending background checks)
         return CredibilityAnalysis(
@@ -100,14 +226,41 @@ class PipelineOrchestrator:
                 },
                 "registry_breakdown": registry_breakdown,
                 "report_path": report_path,
-                "note": "Initial score. Detailed background checks (HR, LinkedIn, Website, Address) in progress."
+                "job_id": job_id,
+                "note": "Initial score. Detailed background checks (HR, LinkedIn, Website, Address) in progress. "
+                        "Track via /verification/jobs/{job_id}."
             }
         )
 
-    async def _run_optional_and_save(self, input_data: CompanyInput, base_score: float, 
-                                      registry_found: bool, email_match: bool,
-                                      report_path: str):
-        """background: optional checks (hr, linkedin, website, address), then save to db"""
+    async def run_checks_job(self, payload: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+        """job handler: optional checks once per job, then one db transaction keyed by job id; safe to retry"""
+        input_data = CompanyInput(**payload["input"])
+        checkpoint = f"job:{job_id}:analysis"
+        saved = await cache_get_async(checkpoint)
+        if saved:
+            # a retry after a failed save: reuse the checked analysis instead of scraping again
+            analysis = CredibilityAnalysis(**saved)
+            logger.info(f"job {job_id}: reusing checked analysis for {input_data.name}")
+        else:
+            analysis = await self._run_optional_checks(
+                input_data, payload["base_score"], payload["registry_found"],
+                payload["email_match"], payload["report_path"]
+            )
+            await cache_set_async(checkpoint, analysis.model_dump(), self.checkpoint_ttl)
+
+        # log lines are appended only once the rows are committed, and only by the first successful attempt
+        if await self._save_verification(job_id, input_data, analysis):
+            try:
+                from app.core.excel_logger import ExcelLogger
+                ExcelLogger.log_verification(input_data, analysis)
+            except Exception as e:
+                logger.error(f"verification log: {e}")
+        return {"analysis": analysis.model_dump()}
+
+    async def _run_optional_checks(self, input_data: CompanyInput, base_score: float,
+                                   registry_found: bool, email_match: bool,
+                                   report_path: str) -> CredibilityAnalysis:
+        """background: optional checks (hr, linkedin, website, address) and the final analysis"""
         logger.info(f"background checks started: {input_data.name}")
         
         hr_verified = False
@@ -119,19 +272,19 @@ class PipelineOrchestrator:
             # moved hr check here
             async def do_hr():
                 if not input_data.hr_name: return {"verified": False}
-                return await asyncio.to_thread(self.scraper.verify_association, input_data.name, input_data.hr_name)
+                return await self.scraper.verify_association(input_data.name, input_data.hr_name)
 
             async def do_linkedin():
                 if not input_data.linkedin_url: return False
-                return await asyncio.to_thread(self.scraper.verify_url_owner, input_data.linkedin_url, input_data.name)
+                return await self.scraper.verify_url_owner(input_data.linkedin_url, input_data.name)
 
             async def do_website():
                 if not input_data.website_urls: return False
-                return await asyncio.to_thread(self.scraper.verify_url_owner, input_data.website_urls[0], input_data.name)
+                return await self.scraper.verify_url_owner(input_data.website_urls[0], input_data.name)
 
             async def do_address():
                 if not input_data.registered_address: return {"verified": False}
-                return await asyncio.to_thread(self.scraper.verify_association, input_data.name, input_data.registered_address)
+                return await self.scraper.verify_association(input_data.name, input_data.registered_address)
 
             hr_res, linkedin, website, addr = await asyncio.gather(do_hr(), do_linkedin(), do_website(), do_address())
             
@@ -156,70 +309,74 @@ class PipelineOrchestrator:
         final_tier = "Verified" if final_score >= 60 else "Needs Review"
         logger.info(f"final score: {input_data.name} = {final_score}")
 
-        # regenerate report with full details
-        try:
-            from app.core.report_generator import ReportGenerator
-            
-            full_analysis = CredibilityAnalysis(
-                trust_score=final_score, trust_tier=final_tier,
-                verification_status="Verified" if final_score >= 60 else "Pending",
-                review_count=0, sentiment_summary="Final verification complete.", scraped_sources=[],
-                red_flags=[],
-                details={"signals": {
-                    "registry_link_found": registry_found, 
-                    "email_domain_match": email_match,
-                    "hr_verified": hr_verified,
-                    "linkedin_verified": linkedin_verified,
-                    "website_verified": website_verified,
-                    "address_verified": address_verified
-                }}
-            )
-            report_gen = ReportGenerator(full_analysis, input_data.name)
-            report_path = report_gen.generate()
-            
-            from app.core.excel_logger import ExcelLogger
-            ExcelLogger.log_verification(input_data, full_analysis)
+        full_analysis = CredibilityAnalysis(
+            trust_score=final_score, trust_tier=final_tier,
+            verification_status="Verified" if final_score >= 60 else "Pending",
+            review_count=0, sentiment_summary="Final verification complete.", scraped_sources=[],
+            red_flags=[],
+            details={"signals": {
+                "registry_link_found": registry_found, 
+                "email_domain_match": email_match,
+                "hr_verified": hr_verified,
+                "linkedin_verified": linkedin_verified,
+                "website_verified": website_verified,
+                "address_verified": address_verified
+            }}
+        )
 
+        # register the analysis behind the report; the pdf renders on first download
+        try:
+            full_analysis.details["report_path"], full_analysis.details["report_digest"] = \
+                await report_store.register(input_data.name, full_analysis)
         except Exception as e:
-             logger.error(f"background report error: {e}")
+            logger.error(f"background report error: {e}")
+            full_analysis.details["report_path"] = report_path
 
-        # save to db
-        if input_data.user_id:
-            await self._save_to_db(input_data, final_score, final_tier, report_path, hr_verified)
+        return full_analysis
 
-    async def _save_to_db(self, input_data: CompanyInput, score: float, tier: str, report_path: str, hr_verified: bool):
-        """save verification to db"""
-        try:
-            from app.core.database import async_session
-            async with async_session() as db:
-                stmt = select(Company).where(Company.company_name.ilike(input_data.name))
-                result = await db.execute(stmt)
-                existing = result.scalars().first()
-
-                if existing:
-                    existing.verification_status = "Verified" if score >= 60 else "Pending"
-                    existing.ai_trust_score = score
-                    existing.ai_trust_tier = tier
-                    existing.ai_report_path = report_path
-                    existing.is_approved = score >= 70
-                    if hr_verified: existing.hr_verified = True # assuming column exists or irrelevant
-                else:
-                    company = Company(
-                        id=str(uuid.uuid4()), company_name=input_data.name, user_id=input_data.user_id,
-                        verification_status="Verified" if score >= 60 else "Pending",
-                        ai_trust_score=score, ai_trust_tier=tier, ai_report_path=report_path,
-                        is_approved=score >= 70, hr_name=input_data.hr_name, email=input_data.hr_email,
+    async def _save_verification(self, job_id: str, input_data: CompanyInput, analysis: CredibilityAnalysis) -> bool:
+        """history row + profile upsert in one transaction; False if this job was already saved (errors raise for retry)"""
+        from app.core.database import async_session
+        signals = analysis.details.get("signals", {})
+        report_path = analysis.details.get("report_path")
+        report_digest = analysis.details.get("report_digest")
+        async with async_session() as db:
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            async with db.begin():
+                history = dialect.insert(VerificationRecord).values(
+                    job_id=job_id, company_name=input_data.name,
+                    company_key=VerificationRecord.make_key(input_data.name),
+                    country=input_data.country, registry_id=input_data.registry_id,
+                    trust_score=analysis.trust_score, trust_tier=analysis.trust_tier,
+                    verification_status=analysis.verification_status,
+                    signals=signals, report_path=report_path, report_digest=report_digest,
+                    user_id=input_data.user_id,
+                ).on_conflict_do_nothing(index_elements=[VerificationRecord.job_id]).returning(VerificationRecord.id)
+                if (await db.execute(history)).scalar() is None:
+                    logger.info(f"job {job_id} already saved: {input_data.name}")
+                    return False
+
+                if input_data.user_id:
+                    verdict = {
+                        "verification_status": analysis.verification_status,
+                        "ai_trust_score": analysis.trust_score, "ai_trust_tier": analysis.trust_tier,
+                        "ai_report_path": report_path, "is_approved": analysis.trust_score >= 70,
+                        "signals": signals, "verified_at": datetime.now(timezone.utc),
+                    }
+                    # single atomic upsert on the unique name_key (no read-modify-write race)
+                    profile = dialect.insert(Company).values(
+                        id=str(uuid.uuid4()), company_name=input_data.name,
+                        name_key=normalize_company_name(input_data.name), user_id=input_data.user_id,
+                        hr_name=input_data.hr_name, email=input_data.hr_email,
                         website_url=input_data.website_urls[0] if input_data.website_urls else None,
                         linkedin_url=input_data.linkedin_url, cin=input_data.registry_id,
                         registered_address=input_data.registered_address, country=input_data.country,
+                        **verdict,
                     )
-                    db.add(company)
-
-                await db.commit()
-                logger.info(f"db saved: {input_data.name}")
-        except Exception as e:
-            logger.error(f"db: {e}")
+                    await db.execute(profile.on_conflict_do_update(index_elements=[Company.name_key], set_=verdict))
+        logger.info(f"db saved: {input_data.name}")
+        return True
 
-    async def run_pipeline(self, input_data: CompanyInput, db: AsyncSession, background_tasks: BackgroundTasks) -> CredibilityAnalysis:
+    async def run_pipeline(self, input_data: CompanyInput, db: AsyncSession, background_tasks=None) -> CredibilityAnalysis:
         """legacy wrapper"""
-        return await self.run_fast_pipeline(input_data, db, background_tasks)
+        return await self.run_fast_pipeline(input_data, db)
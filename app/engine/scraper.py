@@ -1,15 +1,40 @@
-import requests
+import os
+import re
+import asyncio
+import hashlib
+import httpx
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from thefuzz import fuzz
+from app.core.http_client import get_http_client
+from app.core.cache import cache_get_async, cache_set_async
+from app.core.singleflight import SingleFlight
+from app.core import metrics
 
 class WebScraper:
     """web search and content extraction using duckduckgo."""
+
+    # result ttl per call site (seconds); registry pages change rarely, reviews more often
+    SEARCH_TTL = {
+        "registry": 7 * 86400,
+        "url_owner": 3 * 86400,
+        "association": 86400,
+        "reputation": 12 * 3600,
+        "default": 86400,
+    }
+    NEGATIVE_TTL = int(os.getenv("SEARCH_NEGATIVE_TTL", "600"))
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.ua = UserAgent()
-        self.session = requests.Session()
+        self._client = client
+        # identical queries already in flight (e.g. within a batch) share one request
+        self._inflight = SingleFlight("search")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """injected client, else the app-wide pooled one."""
+        return self._client or get_http_client()
 
     def _get_headers(self) -> Dict[str, str]:
         return {
@@ -18,14 +43,38 @@ class WebScraper:
             'Referer': 'https://www.google.com/'
         }
 
-    def search_web(self, query: str, num_results: int = 3) -> List[Dict[str, str]]:
+    @staticmethod
+    def _search_cache_key(query: str, num_results: int) -> str:
+        normalized = re.sub(r"\s+", " ", query.lower()).strip()
+        return f"search:{hashlib.md5(normalized.encode('utf-8')).hexdigest()}:{num_results}"
+
+    async def search_web(self, query: str, num_results: int = 3, site: str = "default") -> List[Dict[str, str]]:
+        """cached web search; empty results are cached briefly as negatives."""
+        key = self._search_cache_key(query, num_results)
+        cached = await cache_get_async(key)
+        if cached is not None:
+            results = cached.get("results", [])
+            metrics.incr("search.cache.hit" if results else "search.cache.negative_hit")
+            return results
+
+        metrics.incr("search.cache.miss")
+        results, _ = await self._inflight.do(key, lambda: self._fetch_and_cache(key, query, num_results, site))
+        return results
+
+    async def _fetch_and_cache(self, key: str, query: str, num_results: int, site: str) -> List[Dict[str, str]]:
+        results = await self._fetch_search(query, num_results)
+        ttl = self.SEARCH_TTL.get(site, self.SEARCH_TTL["default"]) if results else self.NEGATIVE_TTL
+        await cache_set_async(key, {"results": results}, ttl)
+        return results
+
+    async def _fetch_search(self, query: str, num_results: int = 3) -> List[Dict[str, str]]:
         """performs web search via duckduckgo html."""
         search_url = "https://html.duckduckgo.com/html/"
         data = {'q': query}
         
         for attempt in range(2):
             try:
-                resp = self.session.post(search_url, data=data, headers=self._get_headers(), timeout=4)
+                resp = await self.client.post(search_url, data=data, headers=self._get_headers(), timeout=4)
                 
                 if resp.status_code == 200:
                     soup = BeautifulSoup(resp.text, 'html.parser')
@@ -59,9 +108,9 @@ class WebScraper:
         
         return []
 
-    def verify_url_owner(self, url: str, expected_name: str) -> bool:
+    async def verify_url_owner(self, url: str, expected_name: str) -> bool:
         """checks if url belongs to expected company via reverse search."""
-        results = self.search_web(url, num_results=3)
+        results = await self.search_web(url, num_results=3, site="url_owner")
         if not results: return False
         
         top = results[0]
@@ -72,7 +121,7 @@ class WebScraper:
         """calculates fuzzy match score between two strings."""
         return fuzz.token_set_ratio(str1.lower(), str2.lower())
 
-    def perform_reputation_search(self, company_name: str) -> List[Dict[str, str]]:
+    async def perform_reputation_search(self, company_name: str) -> List[Dict[str, str]]:
         """searches for company reviews, complaints, and scam reports."""
         queries = [
             f"{company_name} reviews",
@@ -83,8 +132,9 @@ class WebScraper:
         aggregated = []
         seen = set()
         
-        for q in queries:
-            results = self.search_web(q, num_results=3)
+        # all queries in flight at once, merged in query order
+        batches = await asyncio.gather(*(self.search_web(q, num_results=3, site="reputation") for q in queries))
+        for results in batches:
             for res in results:
                 if res['link'] not in seen:
                     seen.add(res['link'])
@@ -92,10 +142,10 @@ class WebScraper:
                     
         return aggregated
 
-    def verify_association(self, entity1: str, entity2: str) -> Dict[str, Any]:
+    async def verify_association(self, entity1: str, entity2: str) -> Dict[str, Any]:
         """verifies if entity2 is associated with entity1 via web search."""
         query = f'{entity1} {entity2}'
-        results = self.search_web(query, num_results=5)
+        results = await self.search_web(query, num_results=5, site="association")
         
         best_score = 0
         best_source = ""
@@ -1,12 +1,73 @@
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.security import APIKeyHeader
 from dotenv import load_dotenv
 import os
+import time
+import asyncio
+import logging
 from app.verification.router import router as verification_router
+from app.core.http_client import close_http_client
+from app.core.database import engine as db_engine
+from app.core.excel_logger import ExcelLogger
+from app.core import metrics, report_store, parse_pool
+from app.engine.container import EngineContainer
+from app.worker import build_worker
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="company verification service")
+async def _export_excel_periodically(interval: float):
+    """scheduled rebuild of master_log.xlsx from the append-only log."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(ExcelLogger.export_xlsx)
+        except Exception as e:
+            logger.error(f"scheduled excel export failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """builds shared engines once per worker, tears down pooled clients on exit."""
+    app.state.engines = EngineContainer()
+    await app.state.engines.warm_up()
+
+    # in-process consumer so single-container deploys still drain the queue;
+    # disable when running dedicated `python -m app.worker` processes
+    stop = asyncio.Event()
+    worker_task = None
+    if os.getenv("JOB_EMBEDDED_WORKER", "true").lower() in ("1", "true", "yes"):
+        worker_task = asyncio.create_task(build_worker(app.state.engines).run(stop))
+
+    export_interval = float(os.getenv("EXCEL_EXPORT_INTERVAL", "0"))
+    export_task = asyncio.create_task(_export_excel_periodically(export_interval)) if export_interval > 0 else None
+
+    yield
+
+    if export_task:
+        export_task.cancel()
+    stop.set()
+    if worker_task:
+        try:
+            await asyncio.wait_for(worker_task, timeout=float(os.getenv("JOB_SHUTDOWN_GRACE", "30")))
+        except asyncio.TimeoutError:
+            logger.warning("job worker still busy at shutdown; unfinished jobs resume after lease expiry")
+    await close_http_client()
+    await db_engine.dispose()
+    report_store.close_pool()
+    parse_pool.close_pool()
+
+app = FastAPI(title="company verification service", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """per-endpoint latency, reported under timings in /verification/metrics."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        metrics.observe(f"http {request.method} {route.path}", time.perf_counter() - start)
+    return response
 
 API_KEY_NAME = "Legitimacy-engine-key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
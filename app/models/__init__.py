@@ -1,3 +1,4 @@
 from app.models.base import Base
 from app.models.company import Company
 from app.models.allocation import User, Allocation
+from app.models.verification import VerificationRecord
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean, DateTime, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
@@ -33,3 +33,16 @@ class Allocation(Base):
     
     student = relationship("User", foreign_keys=[student_id], back_populates="allocations_as_student")
     faculty = relationship("User", foreign_keys=[faculty_id], back_populates="allocations_as_faculty")
+
+# one row per roster version (faculty_roster.FacultyRosterRegistry)
+class FacultyRosterVersion(Base):
+    __tablename__ = "faculty_rosters"
+
+    id = Column(Integer, primary_key=True)
+    roster_id = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    faculty = Column(JSON, nullable=False)  # list of FacultyProfile dicts
+    updated_at = Column(Float, nullable=False)  # epoch seconds
+
+    # also serves "latest version of a roster" lookups
+    __table_args__ = (UniqueConstraint("roster_id", "version", name="uq_faculty_rosters_version"),)
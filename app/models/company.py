@@ -1,11 +1,28 @@
-from sqlalchemy import Column, String, Float, Boolean
+import re
+from sqlalchemy import Column, String, Float, Boolean, DateTime, JSON, Index
 from app.models.base import Base
 
+# trailing legal forms dropped from the match key (longest first)
+LEGAL_SUFFIXES = [
+    "private limited", "pvt ltd", "pvt limited", "public limited company", "limited", "ltd",
+    "incorporated", "inc", "corporation", "corp", "llc", "llp", "plc", "gmbh", "co",
+]
+_SUFFIX_RE = re.compile(r"(?:\s+(?:%s))+$" % "|".join(re.escape(s) for s in LEGAL_SUFFIXES))
+
+def normalize_company_name(name: str) -> str:
+    """match key: case, punctuation and legal suffixes stripped ("Acme Pvt. Ltd." -> "acme")"""
+    clean = (name or "").lower().replace("&", " and ")
+    clean = re.sub(r"[^\w\s]", " ", clean)
+    clean = re.sub(r"\s+", " ", clean).strip()
+    stripped = _SUFFIX_RE.sub("", clean).strip()
+    return stripped or clean
+
 class Company(Base):
     __tablename__ = "corporate_profiles"
 
     id = Column(String, primary_key=True)
     company_name = Column(String)
+    name_key = Column(String, nullable=True)  # normalize_company_name(company_name)
     
     # verification
     verification_status = Column(String, default="Unverified")
@@ -14,6 +31,8 @@ class Company(Base):
     rejection_reason = Column(String, nullable=True)
     ai_report_path = Column(String, nullable=True)
     is_approved = Column(Boolean, default=False)
+    signals = Column(JSON, nullable=True)
+    verified_at = Column(DateTime(timezone=True), nullable=True)  # last completed verification
     
     # contact
     hr_name = Column(String, nullable=True)
@@ -30,3 +49,9 @@ class Company(Base):
     
     # fk to user table (nullable for testing)
     user_id = Column(String, nullable=True)
+
+    __table_args__ = (
+        # one profile per normalized name; target of the upsert in _save_verification
+        Index("uq_corporate_profiles_name_key", "name_key", unique=True),
+        Index("ix_corporate_profiles_cin", "cin"),
+    )
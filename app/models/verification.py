@@ -0,0 +1,44 @@
+import re
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Integer, Float, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+class VerificationRecord(Base):
+    """one row per completed verification (history), unlike corporate_profiles which keeps the latest"""
+    __tablename__ = "verification_history"
+
+    id = Column(Integer, primary_key=True)
+    company_name = Column(String, nullable=False)
+    company_key = Column(String, nullable=False)  # lowercased name for prefix search
+    country = Column(String, nullable=True)
+    registry_id = Column(String, nullable=True)
+
+    trust_score = Column(Float)
+    trust_tier = Column(String)
+    verification_status = Column(String)
+    signals = Column(JSON)
+    report_path = Column(String, nullable=True)
+    report_digest = Column(String, nullable=True)  # report_store content digest of this verification's report
+
+    user_id = Column(String, nullable=True)
+    job_id = Column(String, nullable=True)  # background job that wrote the row; one row per job
+    # set in python so every row has the same utc format: sqlite compares timestamps as text,
+    # and its CURRENT_TIMESTAMP (no microseconds) would sort against cursor values incorrectly
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # keyset pagination walks (created_at, id) newest first
+        Index("ix_verification_history_created", "created_at", "id"),
+        Index("ix_verification_history_tier_created", "trust_tier", "created_at"),
+        Index("ix_verification_history_status_created", "verification_status", "created_at"),
+        Index("ix_verification_history_score", "trust_score"),
+        Index("uq_verification_history_job_id", "job_id", unique=True),
+        # text_pattern_ops lets postgres use the index for LIKE 'prefix%'
+        Index("ix_verification_history_company_key", "company_key", postgresql_ops={"company_key": "text_pattern_ops"}),
+    )
+
+    @staticmethod
+    def make_key(name: str) -> str:
+        return re.sub(r"\s+", " ", (name or "").lower()).strip()
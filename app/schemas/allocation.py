@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class FacultyProfile(BaseModel):
     id: str
@@ -19,12 +19,43 @@ class StudentProfile(BaseModel):
 
 class AllocationRequest(BaseModel):
     student: StudentProfile
-    available_faculty: List[FacultyProfile]
+    available_faculty: List[FacultyProfile] = []  # inline faculty, or reference a stored roster instead
+    roster_id: Optional[str] = None
+    roster_version: Optional[int] = None  # latest when omitted
 
 class AllocationResponse(BaseModel):
     recommended_faculty_id: str
     faculty_name: str
     confidence_score: float
     reasoning: str
-    is_random_fallback: bool
+    is_random_fallback: bool  # true when the pick is the local fallback ranking, not the ai (name kept for clients)
+    fallback_reason: Optional[str] = None  # timeout | ai_error | ai_unavailable | low_confidence
     alternatives: List[Dict[str, Any]] = []  # List of {id, name, score}
+    local_scores: List[Dict[str, Any]] = []  # top-k local tf-idf pre-ranking sent to the ai: {faculty_id, faculty_name, score}
+    roster_version: Optional[int] = None
+
+class CohortAllocationRequest(BaseModel):
+    students: List[StudentProfile]
+    available_faculty: List[FacultyProfile] = []
+    roster_id: Optional[str] = None
+    roster_version: Optional[int] = None
+
+class CohortAssignment(BaseModel):
+    student_id: str
+    faculty_id: Optional[str] = None  # None when every faculty slot is taken
+    faculty_name: Optional[str] = None
+    expertise_score: float = 0.0
+    score: float = 0.0  # 80% expertise, 20% workload after this assignment
+
+class CohortAllocationResponse(BaseModel):
+    assignments: List[CohortAssignment]
+    unassigned: List[str] = []  # student ids
+    total_score: float
+    faculty_load: Dict[str, int]  # faculty id -> load after allocation
+    build_ms: float
+    solve_ms: float
+    roster_version: Optional[int] = None
+
+class RosterUpload(BaseModel):
+    faculty: List[FacultyProfile]
+    replace: bool = False  # true: the new version holds only these faculty; false: merge by id
@@ -16,6 +16,7 @@ class CompanyInput(BaseModel):
     linkedin_url: Optional[str] = None
     website_urls: Optional[List[str]] = Field(default_factory=list)
     user_id: Optional[str] = None
+    force_refresh: bool = False  # ignore a recent stored verdict and re-run the pipeline
 
 class VerificationResult(BaseModel):
     verified: bool
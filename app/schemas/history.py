@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class HistoryFilter(BaseModel):
+    company: Optional[str] = None  # case-insensitive name prefix
+    tier: Optional[str] = None
+    status: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+
+class ReportExportRequest(HistoryFilter):
+    companies: List[str] = []  # exact company names; empty = every company matching the filter
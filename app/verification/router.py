@@ -1,49 +1,198 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.company import CompanyInput, CredibilityAnalysis
-from app.schemas.allocation import AllocationRequest, AllocationResponse
+from app.schemas.allocation import (
+    AllocationRequest, AllocationResponse, CohortAllocationRequest, CohortAllocationResponse, RosterUpload
+)
+from app.schemas.history import HistoryFilter, ReportExportRequest
 from app.engine.pipeline_orchestrator import PipelineOrchestrator
-from app.engine.factory import get_ai_provider
 from app.engine.allocation_engine import AllocationEngine
-from app.core.document_parser import DocumentParser
-from app.core.database import get_db
-from openpyxl import load_workbook
+from app.engine.faculty_roster import RosterNotFound
+from app.engine.container import get_orchestrator, get_ai, get_allocation_engine, get_jobs
+from app.core.job_queue import JobQueue
+from app.core.excel_logger import ExcelLogger
+from app.core.database import get_db, async_session
+from app.models.verification import VerificationRecord
+from app.core import metrics, report_store, parse_pool
+from app.core.cache import cache_get_async, cache_set_async
+from sqlalchemy import select, tuple_
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import base64
 import logging
-import shutil
+import json
+import time
+import csv
+import io
+import tempfile
+import hashlib
 import os
 
 router = APIRouter(prefix="/verification", tags=["Verification"])
 logger = logging.getLogger(__name__)
 
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+JOB_EVENTS_POLL = float(os.getenv("JOB_EVENTS_POLL", "1"))
+JOB_EVENTS_TIMEOUT = float(os.getenv("JOB_EVENTS_TIMEOUT", "300"))
+
 @router.post("/verify", response_model=CredibilityAnalysis)
-async def verify_company(data: CompanyInput, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+async def verify_company(data: CompanyInput, db: AsyncSession = Depends(get_db),
+                         orchestrator: PipelineOrchestrator = Depends(get_orchestrator)):
     """company verification - returns initial analysis (registry+hr+ai), background checks update db later"""
     try:
-        orchestrator = PipelineOrchestrator()
-        result = await orchestrator.run_fast_pipeline(data, db, background_tasks)
+        result = await orchestrator.run_fast_pipeline(data, db)
         return result
     except Exception as e:
         logger.error(f"verification: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/verify/batch")
+async def verify_company_batch(items: List[CompanyInput],
+                               concurrency: Optional[int] = Query(None, ge=1),
+                               orchestrator: PipelineOrchestrator = Depends(get_orchestrator)):
+    """bulk verification - streams one ndjson line {index, name, result|error} per company as it finishes"""
+    if not items:
+        raise HTTPException(status_code=400, detail="empty batch")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"batch too large (max {BATCH_MAX_ITEMS})")
+
+    limit = min(concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    return StreamingResponse(
+        orchestrator.run_batch(items, limit),
+        media_type="application/x-ndjson"
+    )
+
+def _job_view(job) -> dict:
+    return {
+        "job_id": job.id, "type": job.type, "status": job.status,
+        "attempts": job.attempts, "max_attempts": job.max_attempts, "error": job.error,
+        "created_at": job.created_at, "updated_at": job.updated_at,
+        "analysis": (job.result or {}).get("analysis"),
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, jobs: JobQueue = Depends(get_jobs)):
+    """background verification job status; `analysis` holds the final CredibilityAnalysis once done."""
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return _job_view(job)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, jobs: JobQueue = Depends(get_jobs)):
+    """server-sent events: `status` on every change, then `complete` (final analysis) or `failed`."""
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def events():
+        last_status = None
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        current = job
+        while True:
+            if current and current.status != last_status:
+                last_status = current.status
+                view = _job_view(current)
+                if current.status == "done":
+                    yield f"event: complete\ndata: {json.dumps(view)}\n\n"
+                    return
+                if current.status == "failed":
+                    yield f"event: failed\ndata: {json.dumps(view)}\n\n"
+                    return
+                yield f"event: status\ndata: {json.dumps(view)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if time.monotonic() > deadline or await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL)
+            current = await asyncio.to_thread(jobs.get, job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_SPILL_BYTES = int(os.getenv("UPLOAD_SPILL_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_CHUNK = 256 * 1024
+DOC_CACHE_TTL = int(os.getenv("DOC_CACHE_TTL", str(7 * 86400)))
+
+async def _doc_cache_get(kind: str, key: str) -> Optional[dict]:
+    cached = await cache_get_async(f"doc:{kind}:{key}")
+    metrics.incr(f"doc.cache.{kind}.{'hit' if cached else 'miss'}")
+    return cached
+
+async def _doc_cache_set(kind: str, key: str, value: dict) -> None:
+    await cache_set_async(f"doc:{kind}:{key}", value, DOC_CACHE_TTL)
+
+async def _parse_upload(file: UploadFile) -> dict:
+    """parses an upload in memory; only uploads above UPLOAD_SPILL_BYTES go to a (unique) temp file.
+    results are cached by sha-256 of the bytes, returned in `sha256`."""
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"file exceeds {UPLOAD_MAX_BYTES} bytes")
+
+    buffer, spill, size = io.BytesIO(), None, 0
+    digest = hashlib.sha256()
+    try:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK):
+                digest.update(chunk)
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"file exceeds {UPLOAD_MAX_BYTES} bytes")
+                if spill is None and size > UPLOAD_SPILL_BYTES:
+                    os.makedirs("outputs", exist_ok=True)
+                    spill = tempfile.NamedTemporaryFile(dir="outputs", prefix="upload_", delete=False,
+                                                        suffix=os.path.splitext(file.filename or "")[1])
+                    spill.write(buffer.getvalue())
+                    buffer = None
+                if spill is not None:
+                    spill.write(chunk)
+                else:
+                    buffer.write(chunk)
+
+            sha = digest.hexdigest()
+            # same bytes under another extension parse differently
+            key = f"{os.path.splitext(file.filename or '')[1].lower()}:{sha}"
+            cached = await _doc_cache_get("text", key)
+            if cached:
+                return {**cached, "sha256": sha}
+
+            # parsing runs in the parse process pool, never on the event loop
+            if spill is None:
+                raw = await parse_pool.parse_stream(buffer.getvalue(), file.filename)
+            else:
+                spill.close()
+                raw = await parse_pool.parse(spill.name)
+            if not raw.get("metadata", {}).get("error"):
+                await _doc_cache_set("text", key, raw)
+            return {**raw, "sha256": sha}
+        except parse_pool.ParserBusy:
+            raise HTTPException(status_code=503, detail="document parser busy, retry shortly")
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="document took too long to parse")
+    finally:
+        if spill is not None:
+            spill.close()
+            os.remove(spill.name)
+
 @router.post("/parse/recruiter-registration")
-async def parse_recruiter_registration(file: UploadFile = File(...)):
+async def parse_recruiter_registration(file: UploadFile = File(...), ai = Depends(get_ai)):
     """parses recruiter registration doc and returns structured data."""
-    temp_path = f"outputs/temp_{file.filename}"
-    os.makedirs("outputs", exist_ok=True)
-    
     try:
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        raw = DocumentParser.parse(temp_path)
-        ai = get_ai_provider()
-        extracted_data = ai.extract_company_input(raw['content'])
+        raw = await _parse_upload(file)
+        cached = await _doc_cache_get("company", raw["sha256"])
+        if cached:
+            return cached
+        extracted_data = await ai.extract_company_input(raw['content'])
         
         if extracted_data.get("error"):
              raise HTTPException(status_code=400, detail=extracted_data["error"])
              
+        if extracted_data:
+            await _doc_cache_set("company", raw["sha256"], extracted_data)
         return extracted_data
         
     except HTTPException as he:
@@ -51,15 +200,13 @@ async def parse_recruiter_registration(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"parsing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
 @router.post("/parse/offer-letter")
 async def parse_offer_letter(
     file: UploadFile = File(None),
     student_programme: str = Form(None),
-    offer_text: str = Form(None)
+    offer_text: str = Form(None),
+    ai = Depends(get_ai)
 ):
     """
     parses offer letter and checks relevance to student's programme.
@@ -80,30 +227,33 @@ async def parse_offer_letter(
     
     programme_context = student_programme if student_programme else "not specified"
     
-    temp_path = None
     try:
         if file:
-            temp_path = f"outputs/temp_{file.filename}"
-            os.makedirs("outputs", exist_ok=True)
-            with open(temp_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            raw = DocumentParser.parse(temp_path)
-            content = raw.get('content', '')
+            raw = await _parse_upload(file)
+            content, sha = raw.get('content', ''), raw["sha256"]
         else:
-            content = offer_text
+            content, sha = offer_text, hashlib.sha256(offer_text.encode("utf-8")).hexdigest()
         
         logger.info(f"content length: {len(content)} chars, programme: {programme_context}")
         
-        ai = get_ai_provider()
-        extracted_data = ai.extract_offer_details(content)
-        relevance = ai.verify_internship_relevance(content, programme_context)
+        # relevance depends on the programme, so it is part of the key
+        programme_key = hashlib.sha256(" ".join(programme_context.lower().split()).encode("utf-8")).hexdigest()[:16]
+        cache_key = f"{sha}:{programme_key}"
+        analysis = await _doc_cache_get("offer", cache_key)
+        if not analysis:
+            analysis = await ai.analyze_offer_letter(content, programme_context)
+            extracted, relevance = analysis["extracted_data"], analysis["relevance_analysis"]
+            if extracted and relevance and not extracted.get("error") and not relevance.get("error"):
+                await _doc_cache_set("offer", cache_key, analysis)
+        relevance = analysis["relevance_analysis"]
         
-        logger.info(f"extraction complete - is_relevant: {relevance.get('is_relevant', 'n/a')}")
+        logger.info(f"extraction complete ({analysis['mode']}) - is_relevant: {relevance.get('is_relevant', 'n/a')}")
         
         return {
-            "extracted_data": extracted_data,
+            "extracted_data": analysis["extracted_data"],
             "relevance_analysis": relevance,
-            "student_programme": programme_context
+            "student_programme": programme_context,
+            "analysis_mode": analysis["mode"]
         }
         
     except HTTPException as he:
@@ -111,56 +261,201 @@ async def parse_offer_letter(
     except Exception as e:
         logger.error(f"parsing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
 
 @router.get("/report/{filename}")
 async def get_report(filename: str):
-    """downloads pdf report."""
-    file_path = f"reports/{filename}"
-    if os.path.exists(file_path):
+    """downloads pdf report (rendered on first request, then served from the cache)."""
+    try:
+        file_path = await report_store.resolve(filename)
+    except Exception as e:
+        logger.error(f"report render failed: {e}")
+        raise HTTPException(status_code=500, detail="could not render report")
+    if file_path:
         return FileResponse(file_path, media_type="application/pdf", filename=filename)
     return {"error": "file not found"}
 
+@router.post("/reports/export")
+async def export_reports(request: ReportExportRequest, db: AsyncSession = Depends(get_db)):
+    """streams a zip with, per company, the report of its latest verification matching the filter."""
+    stmt = _history_query(request).where(VerificationRecord.report_path.isnot(None))
+    if request.companies:
+        stmt = stmt.where(VerificationRecord.company_key.in_([VerificationRecord.make_key(c) for c in request.companies]))
+    rows = (await db.execute(stmt.with_only_columns(VerificationRecord.report_path, VerificationRecord.report_digest))).all()
+    # newest first, so the first occurrence of each report is the latest matching verification;
+    # its digest pins that version even if the company was re-verified since
+    reports: Dict[str, Optional[str]] = {}
+    for path, digest in rows:
+        reports.setdefault(os.path.basename(path), digest)
+    if not reports:
+        raise HTTPException(status_code=404, detail="no reports match the filter")
+
+    concurrency = int(os.getenv("REPORT_EXPORT_CONCURRENCY", "4"))
+    return StreamingResponse(
+        report_store.stream_zip(list(reports.items()), concurrency), media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=verification_reports.zip"}
+    )
+
 @router.post("/allocation/recommend", response_model=AllocationResponse)
-async def recommend_guide(request: AllocationRequest):
+async def recommend_guide(request: AllocationRequest, engine: AllocationEngine = Depends(get_allocation_engine)):
     """recommends faculty guide based on expertise match."""
-    engine = AllocationEngine()
-    result = engine.allocate(request)
+    try:
+        result = await engine.allocate(request)
+    except RosterNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return result
+
+@router.post("/allocation/batch", response_model=CohortAllocationResponse)
+async def allocate_cohort(request: CohortAllocationRequest, engine: AllocationEngine = Depends(get_allocation_engine)):
+    """allocates a whole cohort at once, respecting faculty capacity."""
+    max_students = int(os.getenv("ALLOCATION_BATCH_MAX_STUDENTS", "2000"))
+    if len(request.students) > max_students:
+        raise HTTPException(status_code=413, detail=f"at most {max_students} students per batch")
+    try:
+        result = await engine.allocate_cohort(request)
+    except RosterNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    metrics.observe("allocation.batch.solve", result.solve_ms / 1000)
+    logger.info(f"cohort allocation: {len(request.students)} students, {len(result.unassigned)} unassigned, "
+                f"solve {result.solve_ms}ms")
     return result
 
+@router.put("/allocation/roster/{roster_id}")
+async def upsert_roster(roster_id: str, upload: RosterUpload, engine: AllocationEngine = Depends(get_allocation_engine)):
+    """stores a new roster version (merged by faculty id unless replace=true) and indexes it."""
+    roster = await engine.rosters.upsert(roster_id, upload.faculty, upload.replace)
+    return roster.summary()
+
+@router.get("/allocation/roster/{roster_id}")
+async def get_roster(roster_id: str, version: Optional[int] = None, engine: AllocationEngine = Depends(get_allocation_engine)):
+    """returns a roster version (latest by default) with its faculty."""
+    try:
+        roster = await engine.rosters.get(roster_id, version)
+    except RosterNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return {**roster.summary(), "faculty": [f.model_dump() for f in roster.faculty]}
+
 @router.post("/allocation/validate-pair")
-async def validate_allocation_pair(request: dict):
+async def validate_allocation_pair(request: dict, engine: AllocationEngine = Depends(get_allocation_engine)):
     """validates manual student-faculty pairing."""
-    engine = AllocationEngine()
     student = request.get("student")
     faculty = request.get("faculty")
     
     if not student or not faculty:
         raise HTTPException(status_code=400, detail="missing data")
         
-    return engine.validate_pair(student, faculty)
+    return await engine.validate_pair(student, faculty)
+
+HISTORY_FIELDS = ["id", "created_at", "company_name", "country", "registry_id", "trust_score",
+                  "trust_tier", "verification_status", "signals", "report_path"]
+
+def history_filter(company: Optional[str] = None, tier: Optional[str] = None, status: Optional[str] = None,
+                   date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                   min_score: Optional[float] = None, max_score: Optional[float] = None) -> HistoryFilter:
+    return HistoryFilter(company=company, tier=tier, status=status, date_from=date_from, date_to=date_to,
+                         min_score=min_score, max_score=max_score)
+
+def _history_query(f: HistoryFilter):
+    """newest-first history query; every filter maps onto an indexed column."""
+    stmt = select(VerificationRecord)
+    if f.company:
+        prefix = VerificationRecord.make_key(f.company).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(VerificationRecord.company_key.like(f"{prefix}%", escape="\\"))
+    if f.tier:
+        stmt = stmt.where(VerificationRecord.trust_tier == f.tier)
+    if f.status:
+        stmt = stmt.where(VerificationRecord.verification_status == f.status)
+    if f.date_from:
+        stmt = stmt.where(VerificationRecord.created_at >= f.date_from)
+    if f.date_to:
+        stmt = stmt.where(VerificationRecord.created_at <= f.date_to)
+    if f.min_score is not None:
+        stmt = stmt.where(VerificationRecord.trust_score >= f.min_score)
+    if f.max_score is not None:
+        stmt = stmt.where(VerificationRecord.trust_score <= f.max_score)
+    return stmt.order_by(VerificationRecord.created_at.desc(), VerificationRecord.id.desc())
+
+def _history_row(rec: VerificationRecord) -> dict:
+    row = {k: getattr(rec, k) for k in HISTORY_FIELDS}
+    row["created_at"] = rec.created_at.isoformat() if rec.created_at else None
+    return row
+
+def _encode_cursor(rec: VerificationRecord) -> str:
+    raw = json.dumps({"t": rec.created_at.isoformat(), "i": rec.id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(data["t"]), int(data["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
 @router.get("/history")
-async def get_verification_history():
-    """returns verification history from master excel log."""
-    log_path = "reports/master_log.xlsx"
-    if not os.path.exists(log_path):
-        return {"history": []}
-        
+async def get_verification_history(f: HistoryFilter = Depends(history_filter), cursor: Optional[str] = None,
+                                   limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_db)):
+    """paginated verification history (newest first); pass `next_cursor` back as `cursor` for the next page."""
+    stmt = _history_query(f)
+    if cursor:
+        ts, rec_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(VerificationRecord.created_at, VerificationRecord.id) < tuple_(ts, rec_id))
     try:
-        wb = load_workbook(log_path, read_only=True)
-        ws = wb.active
-        
-        data = []
-        headers = [cell.value for cell in ws[1]]
-        
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            entry = dict(zip(headers, row))
-            data.append(entry)
-            
-        return {"count": len(data), "history": data}
+        rows = (await db.execute(stmt.limit(limit + 1))).scalars().all()
     except Exception as e:
         logger.error(f"failed to read history: {e}")
-        raise HTTPException(status_code=500, detail="could not read history log")
+        raise HTTPException(status_code=500, detail="could not read history")
+
+    page = rows[:limit]
+    return {
+        "count": len(page),
+        "history": [_history_row(r) for r in page],
+        "next_cursor": _encode_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+@router.get("/history/export")
+async def export_verification_history(f: HistoryFilter = Depends(history_filter),
+                                      format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """streams the full (filtered) history as ndjson or csv without loading it into memory."""
+    async def rows():
+        # own session: request-scoped dependencies are closed before the body streams
+        async with async_session() as db:
+            result = await db.stream(_history_query(f).execution_options(yield_per=500))
+            if format == "csv":
+                buf = io.StringIO()
+                writer = csv.DictWriter(buf, fieldnames=HISTORY_FIELDS)
+                writer.writeheader()
+                async for rec in result.scalars():
+                    row = _history_row(rec)
+                    row["signals"] = json.dumps(row["signals"])
+                    writer.writerow(row)
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+                if buf.tell():
+                    yield buf.getvalue()
+            else:
+                async for rec in result.scalars():
+                    yield json.dumps(_history_row(rec)) + "\n"
+
+    media = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(rows(), media_type=media,
+                             headers={"Content-Disposition": f"attachment; filename=verification_history.{format}"})
+
+@router.get("/history/xlsx")
+async def export_history_xlsx():
+    """rebuilds master_log.xlsx from the verification log and downloads it."""
+    try:
+        path = await asyncio.to_thread(ExcelLogger.export_xlsx)
+    except Exception as e:
+        logger.error(f"excel export failed: {e}")
+        raise HTTPException(status_code=500, detail="could not export history")
+    return FileResponse(path, filename=os.path.basename(path),
+                        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+@router.get("/metrics")
+async def get_metrics():
+    """per-worker counters, timings and gauges (cache hits, coalescing, pools)."""
+    return metrics.snapshot()
@@ -0,0 +1,58 @@
+"""
+background job worker for post-response verification checks
+
+run standalone (set JOB_EMBEDDED_WORKER=false on the api then):
+    python -m app.worker            # JOB_WORKER_PROCESSES=N for N processes
+"""
+import os
+import sys
+import signal
+import asyncio
+import logging
+import multiprocessing
+from typing import Optional
+from dotenv import load_dotenv
+from app.core.job_queue import JobWorker
+from app.core.http_client import close_http_client
+from app.engine.container import EngineContainer
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+def build_worker(engines: EngineContainer) -> JobWorker:
+    """registers every job type the service produces."""
+    orchestrator = engines.orchestrator
+    return JobWorker(orchestrator.jobs, {
+        orchestrator.CHECKS_JOB: orchestrator.run_checks_job,
+    })
+
+async def run_worker(stop: Optional[asyncio.Event] = None) -> None:
+    engines = EngineContainer()
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # windows: ctrl+c raises KeyboardInterrupt instead
+    try:
+        await build_worker(engines).run(stop)
+    finally:
+        await close_http_client()
+
+def _process_main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run_worker())
+
+if __name__ == "__main__":
+    processes = int(os.getenv("JOB_WORKER_PROCESSES", "1"))
+    if processes <= 1:
+        _process_main()
+    else:
+        procs = [multiprocessing.Process(target=_process_main, name=f"job-worker-{i}") for i in range(processes)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
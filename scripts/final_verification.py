@@ -105,6 +105,25 @@ def run_paranoid_check():
         except Exception as e:
             logger.error(f"persistence check error: {e}")
 
+        # keyset pagination: page 2 must continue after page 1, not repeat it
+        try:
+            r = httpx.get(f"{base_url}/verification/history", params={"limit": 1}, headers=headers)
+            page1 = r.json()
+            if page1.get("next_cursor"):
+                r = httpx.get(f"{base_url}/verification/history",
+                              params={"limit": 1, "cursor": page1["next_cursor"]}, headers=headers)
+                page2 = r.json()
+                ids1 = {h["id"] for h in page1.get("history", [])}
+                ids2 = {h["id"] for h in page2.get("history", [])}
+                if r.status_code == 200 and ids2 and not ids1 & ids2:
+                    logger.info("history pagination: page 2 ok")
+                else:
+                    logger.error(f"history pagination: page 2 repeats page 1 ({ids1} / {ids2})")
+            else:
+                logger.info("history pagination: single page, skipped")
+        except Exception as e:
+            logger.error(f"pagination check error: {e}")
+
         # 5. allocation logic
         logger.info("[5/5] checking allocation logic...")
         alloc_payload = {
@@ -2,19 +2,65 @@ import asyncio
 import sys
 import os
 import logging
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 
 # add parent dir to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import engine, Base
 # import models to register with base
-from app.models.company import Company
-from app.models.allocation import User, Allocation 
+from app.models.company import Company, normalize_company_name
+from app.models.allocation import User, Allocation, FacultyRosterVersion
+from app.models.verification import VerificationRecord
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def migrate_company_columns(connection):
+    """adds columns introduced after corporate_profiles was created, backfills name_key"""
+    inspector = inspect(connection)
+    if "corporate_profiles" not in inspector.get_table_names():
+        return
+    columns = [c["name"] for c in inspector.get_columns("corporate_profiles")]
+    for name in ("name_key", "signals", "verified_at"):
+        if name not in columns:
+            col_type = Company.__table__.c[name].type.compile(dialect=connection.dialect)
+            logger.info(f"adding corporate_profiles.{name} ({col_type})...")
+            connection.execute(text(f"ALTER TABLE corporate_profiles ADD COLUMN {name} {col_type}"))
+
+    rows = connection.execute(text(
+        "SELECT id, company_name FROM corporate_profiles WHERE name_key IS NULL ORDER BY id"
+    )).fetchall()
+    taken = {r[0] for r in connection.execute(text(
+        "SELECT name_key FROM corporate_profiles WHERE name_key IS NOT NULL"
+    ))}
+    for row_id, name in rows:
+        key = normalize_company_name(name or "")
+        if not key or key in taken:
+            # duplicate profile: left without a key so the unique index can still be built
+            logger.warning(f"name_key not set for {row_id} ({name}): duplicate of '{key}'")
+            continue
+        taken.add(key)
+        connection.execute(text("UPDATE corporate_profiles SET name_key = :k WHERE id = :i"), {"k": key, "i": row_id})
+
+    for index in Company.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+def migrate_history_columns(connection):
+    """adds columns introduced after verification_history was created"""
+    inspector = inspect(connection)
+    if "verification_history" not in inspector.get_table_names():
+        return
+    columns = [c["name"] for c in inspector.get_columns("verification_history")]
+    for name in ("job_id", "report_digest"):
+        if name not in columns:
+            col_type = VerificationRecord.__table__.c[name].type.compile(dialect=connection.dialect)
+            logger.info(f"adding verification_history.{name} ({col_type})...")
+            connection.execute(text(f"ALTER TABLE verification_history ADD COLUMN {name} {col_type}"))
+
+    for index in VerificationRecord.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
 async def init_pipeline_db():
     logger.info("starting database initialization...")
     
@@ -31,6 +77,8 @@ async def init_pipeline_db():
             # create tables safely (skips existing)
             logger.info("running create_all (safe mode)...")
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(migrate_company_columns)
+            await conn.run_sync(migrate_history_columns)
             
         logger.info("database verification/initialization completed!")
         